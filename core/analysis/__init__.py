@@ -0,0 +1,4 @@
+from .analyzer import CameraAnalyzer
+from .detector import Detection, Detector, DnnDetector, MotionDetector
+
+__all__ = ['CameraAnalyzer', 'Detection', 'Detector', 'DnnDetector', 'MotionDetector']
\ No newline at end of file
@@ -0,0 +1,201 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from core.camera import Camera
+from .detector import Detection, Detector, MotionDetector
+from utils.datetime import get_date
+from utils.logger import setup_logger
+from utils.timing import StageTimer
+
+
+class CameraAnalyzer:
+    """
+    Runs a detector on all cameras at a fixed analysis rate, independent of the capture rate.
+
+    At each tick, the latest frame of every camera is downscaled into one batch of shape
+    (nb_cameras, height, width, 3), and the detector processes the whole batch at once.
+    Close-ups of the detections are cropped from the full-resolution frames and written
+    to disk by a separate thread, so that neither capture nor analysis waits on the disk.
+
+    Attributes:
+        cameras (list[Camera]): The cameras to analyze.
+        detector (Detector): The detector run on each batch.
+        analysis_fps (float): Number of batches analyzed per second.
+        analysis_size (tuple[int, int]): (width, height) frames are downscaled to before detection.
+        crop_folder (str): Folder where close-ups are saved.
+        crop_margin (float): Margin added around each box when cropping, relative to the box size.
+        crop_cooldown_sec (float): Minimum time between two saved close-ups of the same camera.
+        timer (StageTimer): Durations of each stage of the analysis.
+        last_detections (list[list[Detection]]): Detections of the last tick, in full-resolution coordinates.
+    """
+
+    def __init__(self, cameras: list[Camera], detector: Optional[Detector] = None, analysis_fps: float = 2, analysis_size: tuple[int, int] = (320, 240),
+                 crop_folder: str = "saved_crops", crop_margin: float = 0.2, crop_cooldown_sec: float = 1.0, max_pending_crops: int = 64):
+        self.logger: logging.Logger = setup_logger(self.__class__.__name__, log_file= "logs/camera_analyzer.log")
+        self.cameras = cameras
+        self.detector: Detector = detector if detector is not None else MotionDetector()
+        self.analysis_fps = analysis_fps
+        self.analysis_size = analysis_size
+        self.crop_folder = crop_folder
+        self.crop_margin = crop_margin
+        self.crop_cooldown_sec = crop_cooldown_sec
+        self.timer = StageTimer()
+        self.last_detections: list[list[Detection]] = [[] for _ in cameras]
+
+        width, height = analysis_size
+        self._batch: np.ndarray = np.zeros((len(cameras), height, width, 3), dtype=np.uint8)
+        self._frame_ids: list[int] = [0] * len(cameras)
+        self._last_crop_times: list[float] = [0.0] * len(cameras)
+        self._crop_queue: queue.Queue = queue.Queue(maxsize=max_pending_crops)
+        self._stop_event = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self.ticks: int = 0
+        self.overruns: int = 0
+        self.crops_saved: int = 0
+        self.crops_dropped: int = 0
+
+    def _gather(self) -> tuple[list[Optional[np.ndarray]], np.ndarray]:
+        """Downscales the latest new frame of each camera into the batch
+
+        Returns:
+            tuple[list[Optional[np.ndarray]], np.ndarray]: The full-resolution frames (None if no new frame) and the mask of cameras with a new frame.
+        """
+        frames: list[Optional[np.ndarray]] = [None] * len(self.cameras)
+        valid = np.zeros(len(self.cameras), dtype=bool)
+        width, height = self.analysis_size
+        for idx, camera in enumerate(self.cameras):
+            frame_id, frame = camera.get_latest_frame()
+            if frame is None or frame_id == self._frame_ids[idx]:
+                continue
+            self._frame_ids[idx] = frame_id
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            cv2.resize(frame, (width, height), dst=self._batch[idx], interpolation=cv2.INTER_AREA)
+            frames[idx] = frame
+            valid[idx] = True
+        return frames, valid
+
+    def _to_full_resolution(self, detection: Detection, frame: np.ndarray) -> Detection:
+        """Scales a detection from the analysis size back to the size of the frame, adding the crop margin"""
+        scale_x = frame.shape[1] / self.analysis_size[0]
+        scale_y = frame.shape[0] / self.analysis_size[1]
+        margin_x = detection.w * self.crop_margin / 2
+        margin_y = detection.h * self.crop_margin / 2
+        x1 = max(0, int((detection.x - margin_x) * scale_x))
+        y1 = max(0, int((detection.y - margin_y) * scale_y))
+        x2 = min(frame.shape[1], int((detection.x + detection.w + margin_x) * scale_x))
+        y2 = min(frame.shape[0], int((detection.y + detection.h + margin_y) * scale_y))
+        return Detection(x1, y1, x2 - x1, y2 - y1, detection.score, detection.label)
+
+    def _queue_crops(self, frames: list[Optional[np.ndarray]], detections: list[list[Detection]]) -> None:
+        """Hands the close-ups to the writer thread. Drops them rather than waiting if it is behind"""
+        now = time.time()
+        for idx, (frame, cam_detections) in enumerate(zip(frames, detections)):
+            if frame is None:
+                continue
+            if not cam_detections:
+                self.last_detections[idx] = []
+                continue
+            full_res = [self._to_full_resolution(detection, frame) for detection in cam_detections]
+            self.last_detections[idx] = full_res
+            if now - self._last_crop_times[idx] < self.crop_cooldown_sec:
+                continue
+            self._last_crop_times[idx] = now
+            for detection in full_res:
+                # frames are never modified in place once captured, so a view is enough
+                crop = frame[detection.y:detection.y + detection.h, detection.x:detection.x + detection.w]
+                try:
+                    self._crop_queue.put_nowait((idx, now, detection, crop))
+                except queue.Full:
+                    self.crops_dropped += 1
+
+    def analyze_once(self) -> list[list[Detection]]:
+        """Runs a single analysis tick on the latest frames of all cameras
+
+        Returns:
+            list[list[Detection]]: The detections of each camera, in the coordinates of the analysis size.
+        """
+        with self.timer.measure("gather"):
+            frames, valid = self._gather()
+        with self.timer.measure("detect"):
+            detections = self.detector.detect(self._batch, valid)
+        with self.timer.measure("crop"):
+            self._queue_crops(frames, detections)
+        self.ticks += 1
+        return detections
+
+    def _run_analysis(self) -> None:
+        period = 1 / self.analysis_fps
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set():
+            try:
+                with self.timer.measure("tick"):
+                    self.analyze_once()
+            except Exception as e:
+                self.logger.error(f"Analysis failed: {e}", exc_info=True)
+
+            next_tick += period
+            delay = next_tick - time.perf_counter()
+            if delay < 0:
+                # the analysis is slower than analysis_fps: skip the missed ticks rather than catching up
+                self.overruns += 1
+                next_tick = time.perf_counter()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def _run_crop_writer(self) -> None:
+        while not self._stop_event.is_set() or not self._crop_queue.empty():
+            try:
+                idx, timestamp, detection, crop = self._crop_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self.timer.measure("write"):
+                save_subfolder = os.path.join(self.crop_folder, f"{get_date()}/camera {idx}")
+                os.makedirs(save_subfolder, exist_ok=True)
+                ms = int((timestamp % 1) * 1000)
+                filename = time.strftime("%H_%M_%S", time.localtime(timestamp)) + f"_{ms:03d}_{detection.label}_{detection.x}_{detection.y}.jpg"
+                if cv2.imwrite(os.path.join(save_subfolder, filename), crop):
+                    self.crops_saved += 1
+                else:
+                    self.logger.warning(f"Could not save close-up {filename}")
+
+    def start(self) -> None:
+        """Starts the analysis and the close-up writer in background threads"""
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._run_analysis, name="analysis", daemon=True),
+            threading.Thread(target=self._run_crop_writer, name="crop-writer", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        self.logger.info(f"Analyzing {len(self.cameras)} cameras at {self.analysis_fps} fps with {self.detector.__class__.__name__}")
+
+    def stop(self) -> None:
+        """Stops the analysis, after writing the pending close-ups"""
+        self._stop_event.set()
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+        self.logger.info(f"Analysis stopped: {self.get_stats()}")
+
+    def get_stats(self) -> dict:
+        """Returns the counters of the analysis and the timing of each stage
+
+        Returns:
+            dict: ticks, overruns (ticks later than analysis_fps allows), saved and dropped close-ups,
+                and the average/max time of the gather, detect, crop, tick and write stages.
+        """
+        return {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "crops_saved": self.crops_saved,
+            "crops_dropped": self.crops_dropped,
+            "stages": self.timer.snapshot(),
+        }
@@ -0,0 +1,158 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# BGR -> luma weights, used to convert a whole batch to grayscale at once
+LUMA_WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+class Detection:
+    """
+    A detected object, in the coordinates of the image it was detected on.
+
+    Attributes:
+        x (int): Left of the bounding box.
+        y (int): Top of the bounding box.
+        w (int): Width of the bounding box.
+        h (int): Height of the bounding box.
+        score (float): Confidence of the detection, between 0 and 1.
+        label (str): What was detected.
+    """
+
+    def __init__(self, x: int, y: int, w: int, h: int, score: float, label: str):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.score = score
+        self.label = label
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.label} {self.score:.2f} at x={self.x} y={self.y} w={self.w} h={self.h})"
+
+
+class Detector(ABC):
+    """
+    Base class of the detectors used by the CameraAnalyzer.
+
+    A detector receives the downscaled frames of all cameras as a single batch,
+    so that it can process them at once instead of camera by camera.
+    """
+
+    @abstractmethod
+    def detect(self, batch: np.ndarray, valid: np.ndarray) -> list[list[Detection]]:
+        """Detects objects in a batch of frames
+
+        Args:
+            batch (np.ndarray): uint8 BGR frames of shape (nb_cameras, height, width, 3).
+            valid (np.ndarray): bool array of shape (nb_cameras,). False where a camera has no new frame.
+
+        Returns:
+            list[list[Detection]]: The detections of each camera, in the coordinates of `batch`.
+        """
+
+
+class MotionDetector(Detector):
+    """
+    Classical detector: finds the regions that differ from a running average of the past frames.
+
+    The background update and the thresholding are done on the whole batch at once.
+    Only the extraction of the bounding boxes is done camera by camera.
+
+    Attributes:
+        threshold (float): Minimum difference in gray level for a pixel to be considered moving.
+        learning_rate (float): How fast the background adapts to the new frames (between 0 and 1).
+        min_area_ratio (float): Minimum area of a box, relative to the frame area.
+    """
+
+    def __init__(self, threshold: float = 25, learning_rate: float = 0.05, min_area_ratio: float = 0.002):
+        self.threshold = threshold
+        self.learning_rate = learning_rate
+        self.min_area_ratio = min_area_ratio
+        self._background: Optional[np.ndarray] = None
+        # per camera: whether its background was initialized from one of its frames
+        self._initialized: Optional[np.ndarray] = None
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+
+    def detect(self, batch: np.ndarray, valid: np.ndarray) -> list[list[Detection]]:
+        gray = batch @ LUMA_WEIGHTS
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = np.zeros_like(gray)
+            self._initialized = np.zeros(len(batch), dtype=bool)
+        # a camera's background starts from its first frame (cameras may deliver it late, e.g. network
+        # sources): its slot in the batch is blank until then, and nothing is detected on that first frame
+        first_frame = valid & ~self._initialized
+        self._background[first_frame] = gray[first_frame]
+        self._initialized |= first_frame
+        compared = valid & ~first_frame
+
+        moving = np.abs(gray - self._background) > self.threshold
+        # only learn from cameras which provided a new frame
+        update = compared[:, None, None]
+        self._background += np.where(update, self.learning_rate * (gray - self._background), 0)
+
+        min_area = self.min_area_ratio * gray.shape[1] * gray.shape[2]
+        detections: list[list[Detection]] = []
+        for idx in range(len(batch)):
+            cam_detections: list[Detection] = []
+            if compared[idx]:
+                mask = cv2.dilate(moving[idx].astype(np.uint8) * 255, self._kernel, iterations=2)
+                contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                for contour in contours:
+                    x, y, w, h = cv2.boundingRect(contour)
+                    if w * h < min_area:
+                        continue
+                    score = float(moving[idx, y:y + h, x:x + w].mean())
+                    cam_detections.append(Detection(x, y, w, h, score, "motion"))
+            detections.append(cam_detections)
+        return detections
+
+
+class DnnDetector(Detector):
+    """
+    Runs an SSD-style OpenCV DNN model (e.g. MobileNet-SSD) on the batch in a single forward pass.
+
+    The model output is expected to be of shape (1, 1, nb_detections, 7), each row being
+    [image_id, class_id, confidence, x1, y1, x2, y2] with coordinates normalized to [0, 1].
+
+    Attributes:
+        net (cv2.dnn.Net): The loaded network.
+        input_size (tuple[int, int]): (width, height) the network expects.
+        confidence (float): Minimum confidence of a detection.
+        class_names (Optional[list[str]]): Names of the classes, by class id.
+    """
+
+    def __init__(self, model_path: str, config_path: str = "", input_size: tuple[int, int] = (300, 300), scale: float = 1 / 127.5,
+                 mean: tuple[float, float, float] = (127.5, 127.5, 127.5), swap_rb: bool = False, confidence: float = 0.5, class_names: Optional[list[str]] = None):
+        self.net: cv2.dnn.Net = cv2.dnn.readNet(model_path, config_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.input_size = input_size
+        self.scale = scale
+        self.mean = mean
+        self.swap_rb = swap_rb
+        self.confidence = confidence
+        self.class_names = class_names
+
+    def detect(self, batch: np.ndarray, valid: np.ndarray) -> list[list[Detection]]:
+        detections: list[list[Detection]] = [[] for _ in range(len(batch))]
+        valid_indices = np.flatnonzero(valid)
+        if len(valid_indices) == 0:
+            return detections
+
+        blob = cv2.dnn.blobFromImages(list(batch[valid_indices]), self.scale, self.input_size, self.mean, self.swap_rb, crop=False)
+        self.net.setInput(blob)
+        output = self.net.forward().reshape(-1, 7)
+
+        height, width = batch.shape[1:3]
+        for image_id, class_id, score, x1, y1, x2, y2 in output[output[:, 2] >= self.confidence]:
+            x1, x2 = np.clip([x1 * width, x2 * width], 0, width).astype(int)
+            y1, y2 = np.clip([y1 * height, y2 * height], 0, height).astype(int)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            class_id = int(class_id)
+            label = self.class_names[class_id] if self.class_names and class_id < len(self.class_names) else str(class_id)
+            detections[valid_indices[int(image_id)]].append(Detection(x1, y1, x2 - x1, y2 - y1, float(score), label))
+        return detections
@@ -1,4 +1,5 @@
 from .camera import Camera
+from .camera_source import CameraSource, configure_network_capture
 from .camera_manager.camera_manager import CameraManager
 
-__all__ = ['Camera', 'CameraManager']
\ No newline at end of file
+__all__ = ['Camera', 'CameraSource', 'CameraManager', 'configure_network_capture']
\ No newline at end of file
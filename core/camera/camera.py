@@ -2,119 +2,299 @@ import numpy as np
 import cv2
 from typing import Optional
 import logging
+import threading
+import time
+from .camera_source import CameraSource, SourceStats
 from utils.logger import setup_logger
 
 
 class Camera:
     """
-    Captures video from a connected camera using OpenCV.
+    Captures video from a connected camera, a network stream or a video file using OpenCV.
 
     This class manages the initialization, live video capture, display,
     and teardown of a video stream. Pressing 'q' in the video window stops the feed.
+    Frames are read by a single background thread; consumers get the latest one.
 
     Attributes:
-        camera_index (int): Index of the camera to use (default is 0).
+        camera_idx (int | str): Index of the camera, or URL/path of the stream to use (default is 0).
+        source (CameraSource): Where frames are read from, and how (reconnection, low latency, ...).
         window_name (str): Title of the OpenCV display window.
         cap (Optional[cv2.VideoCapture]): OpenCV video capture object or None.
         is_running (bool): Indicates whether the camera is currently streaming.
+        stats (SourceStats): Ingest statistics of the source.
     
     Methods:
         start(): Initializes the camera and begins streaming.
+        get_latest_frame(): Returns the latest captured frame without waiting.
+        wait_for_frame(): Waits for a frame newer than the last consumed one.
+        get_stats(): Returns fps, jitter and latency statistics of the source.
         run(): Continuously reads and displays frames until stopped.
         stop(): Releases the camera and closes the display window.
     """
 
-    def __init__(self, camera_idx: int = 0, window_name: str = "Camera Stream") -> None:
+    def __init__(self, camera_idx: int | str | CameraSource = 0, window_name: str = "Camera Stream") -> None:
         """Initialize the Camera instance.
 
         Args:
-            camera_idx (int, optional): Index of the camera device. Defaults to 0.
+            camera_idx (int | str | CameraSource, optional): Index of the camera device, URL of a network stream (rtsp://, http://, ...)
+                or path of a video file. Defaults to 0.
             window_name (str, optional): Name of the OpenCV display window. Defaults to "Camera Stream".
         """
-        self.camera_idx: int = camera_idx
+        self.source: CameraSource = camera_idx if isinstance(camera_idx, CameraSource) else CameraSource(camera_idx)
+        self.camera_idx: int | str = self.source.source
         self.window_name: str = window_name
         self.window_opened: bool = False
         self.cap: Optional[cv2.VideoCapture] = None
         self.is_running : bool = False
+        self.stats: SourceStats = SourceStats()
+        self._capture_thread: Optional[threading.Thread] = None
+        self._stop_event: threading.Event = threading.Event()
+        self._frame_cond: threading.Condition = threading.Condition()
+        self._latest_frame: Optional[np.ndarray] = None
+        self._frame_id: int = 0
         self.logger: logging.Logger = setup_logger(self.__class__.__name__, log_file= "logs/camera.log")
     
     def start(self) -> None:
         """Open the video capture device and sets up capturing frames properly
 
+        Network sources are opened by the capture thread, so that a slow or unreachable
+        stream does not hold up the other cameras.
+
         Raises:
             RuntimeError: if the camera cannot be opened
         """
         # Open Camera
-        self.cap = cv2.VideoCapture(self.camera_idx)
-        if not self.cap.isOpened():
-            error_msg = f"Error: Could not open camera nb. {self.camera_idx}"
-            self.logger.error(error_msg)
-            raise RuntimeError(error_msg)
+        if self.source.kind != "network":
+            self.cap = self.source.open()
+            if not self.cap.isOpened():
+                error_msg = f"Error: Could not open camera {self.source.label}"
+                self.logger.error(error_msg)
+                raise RuntimeError(error_msg)
 
-        # Run the frame capture and display process till use interruption
+        # Run the frame capture process till use interruption
         self.is_running = True
-        self.logger.info("Camera started")
+        self.stats = SourceStats()
+        self._stop_event.clear()
+        self._capture_thread = threading.Thread(target=self._capture_loop, name=f"capture-{self.source.label}", daemon=True)
+        self._capture_thread.start()
+        self.logger.info(f"Camera {self.source.label} started")
+
+    def _open_source(self) -> bool:
+        """(Re)opens the source from the capture thread, waiting with exponential backoff while it fails
+
+        Returns:
+            bool: True if the source is open, False if the camera was stopped meanwhile
+        """
+        delay = self.source.reconnect_delay_sec
+        while self.is_running:
+            self.cap = self.source.open()
+            if self.cap.isOpened():
+                self.logger.info(f"Connected to {self.source.label}")
+                return True
+            self.cap.release()
+            self.cap = None
+            if not self.source.reconnect:
+                self.logger.error(f"Error: Could not open camera {self.source.label}")
+                return False
+            self.logger.warning(f"Could not open {self.source.label}, retrying in {delay:.1f}s")
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, self.source.max_reconnect_delay_sec)
+        return False
+
+    def _get_frame_period(self) -> float:
+        """Returns the time between frames to respect when reading a file in real time, or 0 for live sources"""
+        if self.source.kind != "file" or not self.source.realtime:
+            return 0.0
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        return 1 / fps if fps > 0 else 0.0
+
+    def _capture_loop(self) -> None:
+        """Reads frames from the source and publishes the latest one.
+
+        This is the only place that reads from `cap`: the web stream, the display
+        and the savers all consume the published frame instead of reading the device themselves.
+        Since frames are read as soon as they arrive, the capture buffer never fills up
+        and consumers always get the most recent frame (older ones are dropped).
+        """
+        # USB and file sources were already opened by start()
+        frame_period = self._get_frame_period() if self.cap is not None else 0.0
+        frames_since_rewind = 0
+        retry_delay = self.source.reconnect_delay_sec
+        next_frame_time = time.perf_counter()
+        while self.is_running:
+            if self.cap is None:
+                if not self._open_source():
+                    self.is_running = False
+                    break
+                frame_period = self._get_frame_period()
+                frames_since_rewind = 0
+
+            read_start = time.perf_counter()
+            ret, frame = self.cap.read()
+            read_end = time.perf_counter()
+            if not ret:
+                self.stats.record_failure()
+                if self.source.kind == "file" and self.source.loop and frames_since_rewind > 0:
+                    # end of the file: start it over to emulate a live stream
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    frames_since_rewind = 0
+                    continue
+                if self.source.reconnect and self.is_running:
+                    self.cap.release()
+                    self.cap = None
+                    self.stats.record_reconnect()
+                    self._drop_latest_frame()
+                    if frames_since_rewind == 0:
+                        # the source opens but yields no frame: back off as when opening fails, instead of reopening it in a tight loop
+                        self.logger.warning(f"No frame from {self.source.label}, reconnecting in {retry_delay:.1f}s")
+                        self._stop_event.wait(retry_delay)
+                        retry_delay = min(retry_delay * 2, self.source.max_reconnect_delay_sec)
+                    else:
+                        self.logger.warning(f"Lost {self.source.label}, reconnecting")
+                        retry_delay = self.source.reconnect_delay_sec
+                    continue
+                self.logger.error(f"Failed to read frame from {self.source.label}")
+                self.stop()
+                break
+
+            frames_since_rewind += 1
+            self.stats.record_frame(read_start, read_end)
+            with self._frame_cond:
+                self._latest_frame = frame
+                self._frame_id += 1
+                self._frame_cond.notify_all()
+
+            if frame_period:
+                # pace file sources at their native fps
+                next_frame_time = max(next_frame_time + frame_period, read_end)
+                self._stop_event.wait(max(0.0, next_frame_time - time.perf_counter()))
+
+        # stop() may have given up waiting for a blocking read: release the capture here in that case
+        if self.cap:
+            self.cap.release()
+        # wake up consumers waiting on a frame that will never come
+        self._drop_latest_frame()
+
+    def _drop_latest_frame(self) -> None:
+        """Forgets the latest frame once the source is lost, so that consumers get None instead of a frozen frame"""
+        with self._frame_cond:
+            self._latest_frame = None
+            self._frame_cond.notify_all()
 
-    def generate_frames(self):
+    def get_stats(self) -> dict[str, float | str]:
+        """Returns the ingest statistics of the camera (fps, jitter, read latency, reconnects, ...)
+
+        Returns:
+            dict[str, float | str]: The source label and kind, along with SourceStats.snapshot()
+        """
+        return {"source": self.source.label, "kind": self.source.kind, **self.stats.snapshot()}
+
+    def get_latest_frame(self) -> tuple[int, np.ndarray | None]:
+        """Returns the latest captured frame without waiting
+
+        Returns:
+            tuple[int, np.ndarray | None]: The id of the frame (increases with each new frame) and the frame itself, or None if no frame was captured yet.
+                The frame is shared between consumers and must not be modified in place.
+        """
+        with self._frame_cond:
+            return self._frame_id, self._latest_frame
+
+    def wait_for_frame(self, last_frame_id: int = 0, timeout: float = 1.0) -> tuple[int, np.ndarray | None]:
+        """Waits until a frame newer than `last_frame_id` is captured
+
+        Args:
+            last_frame_id (int, optional): Id of the last frame the caller consumed. Defaults to 0 (any frame).
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to 1.0.
+
+        Returns:
+            tuple[int, np.ndarray | None]: The id and the frame. If the timeout expired, the latest frame (possibly None or already consumed) is returned.
+        """
+        with self._frame_cond:
+            self._frame_cond.wait_for(lambda: self._frame_id > last_frame_id or not self.is_running, timeout=timeout)
+            return self._frame_id, self._latest_frame
+
+    def generate_frames(self, client=None):
         """
         Generator that yields JPEG-encoded video frames for MJPEG streaming.
 
+        Args:
+            client (optional): The viewer being streamed to (e.g. a StreamClient). If provided, its `scale`,
+                `jpeg_quality` and `max_fps` are applied to each frame, and its `record_sent(nb_bytes)`
+                is called once each frame was consumed by the server. Defaults to None (full quality).
+
         Yields:
             bytes: Multipart JPEG frame suitable for HTTP MJPEG streaming.
         """
         try:
             if not self.is_running:
-                self.logger.warning("generate_frames() called, but camera is not running.")
+                self.logger.warning(f"generate_frames() called, but camera {self.source.label} is not running.")
                 return
+            frame_id = 0
+            last_sent = 0.0
             while self.is_running:
-                # read frame
-                success, frame = self.cap.read()
-                if not success:
-                    self.logger.error("Failed to read frame")
-                    self.stop() 
+                # wait for a frame that was not streamed yet
+                new_frame_id, frame = self.wait_for_frame(frame_id)
+                if frame is None or new_frame_id == frame_id:
+                    continue
+                frame_id = new_frame_id
+                encode_params = []
+                if client is not None:
+                    # degrade the stream as requested by the client
+                    if client.max_fps and time.perf_counter() - last_sent < 1 / client.max_fps:
+                        continue
+                    if client.scale < 1:
+                        frame = cv2.resize(frame, None, fx=client.scale, fy=client.scale, interpolation=cv2.INTER_AREA)
+                    if client.jpeg_quality:
+                        encode_params = [cv2.IMWRITE_JPEG_QUALITY, client.jpeg_quality]
                 # encode frame
-                ret, buffer = cv2.imencode(".jpg", frame)
+                ret, buffer = cv2.imencode(".jpg", frame, encode_params)
                 if not ret:
-                    self.logger.error("Failed to encode frame.")
+                    self.logger.error(f"Failed to encode frame from {self.source.label}.")
                     continue
                 frame_bytes = buffer.tobytes()
-                # yield the frame
-                yield (b'--frame\r\n'
+                chunk = (b'--frame\r\n'
                     b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                last_sent = time.perf_counter()
+                # yield the frame. Execution resumes once the server wrote it and asks for the next one
+                yield chunk
+                if client is not None:
+                    client.record_sent(len(chunk))
         except Exception as e:
             self.logger.warning(f"An exception occurred during frame generation: {e}")
             self.stop()
 
     def capture_frame(self) -> np.ndarray | None:
-        """Captures and returns a single frame, or None
+        """Returns the latest captured frame, or None
+
+        Waits for the first frame if the camera was just started. Returns None while
+        the source is lost (e.g. reconnecting) or once the camera was stopped.
 
         Returns:
             np.ndarray | None: The captured frame or lack-there-of if failed to capture it
         """
-
-        ret, frame = self.cap.read()
-        if ret:
-            return frame
-        else:
-            self.logger.error("Failed to capture frame")
-            return None
+        _, frame = self.wait_for_frame()
+        if frame is None:
+            self.logger.error(f"Failed to capture frame from {self.source.label}")
+        return frame
 
     def run(self) -> None:
         """Display video frames in a loop until the user stops the stream.
 
         Shows the video in a named OpenCV window. The loop continues until the
-        user presses the 'q' key. Each frame is read and displayed.
+        user presses the 'q' key. Each new frame is displayed.
+        Only meant for a single camera: for several cameras, use CameraManager.run_all_cameras().
         """
         print("Press 'q' to quit...")
+        frame_id = 0
         # while process should be running
         while self.is_running:
-            # Read a frame
-            ret, frame = self.cap.read()
-            if not ret:
-                self.logger.error("Failed to read frame")
-                self.stop()
+            # Wait for a new frame
+            new_frame_id, frame = self.wait_for_frame(frame_id)
+            if frame is None or new_frame_id == frame_id:
                 continue
-                
+            frame_id = new_frame_id
+
             """Any Processing could go here"""
 
             # show the frame that was read
@@ -133,10 +313,18 @@ class Camera:
         """
         # signal that the camera process should stop running
         self.is_running = False
-        # Release the cap
-        if self.cap:
+        self._stop_event.set()
+        # wait for the capture thread to be done with the cap before releasing it
+        capture_thread_alive = False
+        if self._capture_thread and self._capture_thread is not threading.current_thread():
+            self._capture_thread.join(timeout=2)
+            capture_thread_alive = self._capture_thread.is_alive()
+        self._capture_thread = None
+        self._drop_latest_frame()
+        # Release the cap (if still blocked in a read, the capture thread releases it on exit)
+        if self.cap and not capture_thread_alive:
             self.cap.release()
-            self.logger.info("Camera Stopped")
+            self.logger.info(f"Camera {self.source.label} Stopped")
         # destroy the opencv windows of this camera:
         if self.window_opened:
             try:
@@ -3,9 +3,12 @@ import cv2
 import threading
 import logging
 import time
+from typing import Optional, TYPE_CHECKING
 
+from .camera_manager_display import CameraManagerDisplay
 from .camera_manager_recorder import CameraManagerRecorder
 from ..camera import Camera
+from ..camera_source import CameraSource, configure_network_capture
 from utils.logger import setup_logger
 from utils.validators import validate_bt_zero, validate_between_inclusive
 from utils.file_manipulator import clear_folder, get_file_size_on_disk
@@ -13,25 +16,41 @@ from utils.constants import HOUR_TO_SEC, BYTE_TO_MB
 from utils.datetime import get_date
 import os
 
+if TYPE_CHECKING:
+    from core.analysis import CameraAnalyzer, Detector
+
 MIN_TESTED_INDICES = 1
 MAX_TESTED_INDICES = 15
 
 class CameraManager:
-    def __init__(self, nb_wanted_cameras: int, max_tested_indices: int = 10, save_fps = 10, vid_folder = "saved_vids", save_folder = "saved_imgs", delete_prior_saves = True, save_interval: int = 5):
+    def __init__(self, nb_wanted_cameras: int, max_tested_indices: int = 10, save_fps = 10, vid_folder = "saved_vids", save_folder = "saved_imgs", delete_prior_saves = True, save_interval: int = 5, sources: Optional[list[str | CameraSource]] = None, capture_profile: Optional[dict] = None, low_latency: bool = True):
+        """
+        Args:
+            nb_wanted_cameras (int): Number of USB cameras to detect. Can be 0 if `sources` are provided.
+            sources (Optional[list[str | CameraSource]], optional): Network streams (rtsp://, http://, ...) or video files
+                to use in addition to the USB cameras. Each one gets its own reader thread. Defaults to None.
+            capture_profile (Optional[dict], optional): Requested "width", "height" and "fps" of the USB cameras. Defaults to None (device defaults).
+            low_latency (bool, optional): Whether network streams are read without FFmpeg buffering. Applies to every network
+                capture of the process (see configure_network_capture()). Defaults to True.
+        """
         self.logger: logging.Logger = setup_logger(self.__class__.__name__, log_file= "logs/camera_manager.log")
+        sources = sources or []
+        self.capture_profile: dict = capture_profile or {}
 
-        self._validate_inputs(nb_wanted_cameras, max_tested_indices)
+        self._validate_inputs(nb_wanted_cameras, max_tested_indices, len(sources))
+        configure_network_capture(low_latency)
     
         self.available_camera_indices: list[int] = self._detect_cameras(nb_wanted_cameras, max_tested_indices)
-        self.cameras: list[Camera] = self._open_available_cameras()
+        self.cameras: list[Camera] = self._open_available_cameras() + self._open_sources(sources)
         self.start_all_cameras()
+        self.analyzer: Optional["CameraAnalyzer"] = None
         self.rec = CameraManagerRecorder(save_fps=save_fps, vid_folder=vid_folder, save_folder=save_folder, delete_prior_saves=delete_prior_saves, save_interval=save_interval)
         self.prep_img_saving()
         self.prep_vid_saving()
 
-    def _validate_inputs(self, nb_wanted_cameras: int, max_tested_indices: int) -> None:
-        if not validate_bt_zero(nb_wanted_cameras):
-            msg: str = f"in {self.__class__.__name__}, nb_wanted_cameras needs to be positive. Provided value was {nb_wanted_cameras}"
+    def _validate_inputs(self, nb_wanted_cameras: int, max_tested_indices: int, nb_sources: int = 0) -> None:
+        if nb_wanted_cameras < 0 or not validate_bt_zero(nb_wanted_cameras + nb_sources):
+            msg: str = f"in {self.__class__.__name__}, nb_wanted_cameras needs to be positive (or zero if sources are provided). Provided value was {nb_wanted_cameras}"
             self.logger.error(msg)
             raise RuntimeError(msg)
         if not validate_between_inclusive(max_tested_indices, MIN_TESTED_INDICES, MAX_TESTED_INDICES):
@@ -78,7 +97,17 @@ class CameraManager:
         """
         cameras: list[Camera] = []
         for cam_idx in self.available_camera_indices:
-            cameras.append(Camera(cam_idx, f"Camera Stream {cam_idx}"))
+            cameras.append(Camera(CameraSource(cam_idx, **self.capture_profile), f"Camera Stream {cam_idx}"))
+        return cameras
+
+    def _open_sources(self, sources: list[str | CameraSource]) -> list[Camera]:
+        """Creates a camera for each network stream or video file
+        """
+        cameras: list[Camera] = []
+        for source in sources:
+            if not isinstance(source, CameraSource):
+                source = CameraSource(source)
+            cameras.append(Camera(source, f"Camera Stream {source.label}"))
         return cameras
 
     def start_all_cameras(self):
@@ -86,30 +115,62 @@ class CameraManager:
             camera.start()
 
     def stop_all_cameras(self):
+        self.stop_analysis()
         for camera in self.cameras:
             camera.stop()
 
-    def run_all_cameras(self):
-        """Runs all cameras in different threads
+    def start_analysis(self, detector: Optional["Detector"] = None, analysis_fps: float = 2, crop_folder: str = "saved_crops") -> "CameraAnalyzer":
+        """Starts detecting objects on all cameras and saving close-ups of them, in background threads
+
+        Args:
+            detector (Optional[Detector], optional): The detector to use. Defaults to None (motion detection).
+            analysis_fps (float, optional): Number of analyses per second, independent of the capture fps. Defaults to 2.
+            crop_folder (str, optional): Folder where the close-ups are saved. Defaults to "saved_crops".
+
+        Returns:
+            CameraAnalyzer: The running analyzer, e.g. to read its stats
         """
-        self.logger.info("Running all Cameras")
-        threads: list[threading.Thread] = []
-        for camera in self.cameras:
-            t = threading.Thread(target=camera.run)
-            t.start()
-            threads.append(t)
+        # imported here since core.analysis depends on core.camera
+        from core.analysis import CameraAnalyzer
+        self.stop_analysis()
+        self.analyzer = CameraAnalyzer(self.cameras, detector=detector, analysis_fps=analysis_fps, crop_folder=crop_folder)
+        self.analyzer.start()
+        return self.analyzer
+
+    def stop_analysis(self) -> None:
+        if self.analyzer is not None:
+            self.analyzer.stop()
+            self.analyzer = None
+
+    def get_cameras_stats(self) -> list[dict[str, float | str]]:
+        """Returns the ingest statistics (fps, jitter, read latency, reconnects, ...) of every camera
+        """
+        return [camera.get_stats() for camera in self.cameras]
 
-        #  wait for all cameras to finish before exiting method call
-        for t in threads:
-            t.join()
+    def run_all_cameras(self, refresh_fps: float = 30, headless: bool = False, output_path: Optional[str] = None, duration_sec: Optional[float] = None) -> dict[str, float]:
+        """Displays all cameras tiled in a single window, from the calling thread
 
-        self.logger.info("All Cameras Stopped.")
+        Args:
+            refresh_fps (float, optional): Target refresh rate of the display. Defaults to 30.
+            headless (bool, optional): If True, no window is opened and the composite is only rendered in memory. Defaults to False.
+            output_path (Optional[str], optional): If provided, the composite is also written to this image or video file. Defaults to None.
+            duration_sec (Optional[float], optional): Stop after this many seconds. Defaults to None (until 'q' is pressed).
+
+        Returns:
+            dict[str, float]: Stats of the display loop (see CameraManagerDisplay.run)
+        """
+        self.logger.info("Running all Cameras")
+        self.display = CameraManagerDisplay(refresh_fps=refresh_fps, headless=headless, output_path=output_path)
+        stats = self.display.run(self.cameras, duration_sec=duration_sec)
+        self.logger.info("Display of all Cameras Stopped.")
+        return stats
     
     def prep_img_saving(self):
-        self.rec.prep_img_saving(self.available_camera_indices)
+        # subfolders are named after the position of the camera, like in save_imgs_periodically()
+        self.rec.prep_img_saving(list(range(len(self.cameras))))
 
     def prep_vid_saving(self):
-        self.rec.prep_vid_saving(self.available_camera_indices)
+        self.rec.prep_vid_saving(list(range(len(self.cameras))))
 
     def estimate_storage_per_hour_cam(self, camera_idx: int) -> None:
         """Estimate the storage required by camera per hour
@@ -121,7 +182,7 @@ class CameraManager:
         self.rec.estimate_storage_per_hour_cam(camera)
 
     def estimate_storage_per_hour(self) -> None:
-        for camera_idx in self.available_camera_indices:
+        for camera_idx in range(len(self.cameras)):
             self.estimate_storage_per_hour_cam(camera_idx)
 
     def estimate_vid_storage_per_hour_cam(self, camera_idx: int, estimation_duration_sec = 5) -> None:
@@ -129,7 +190,7 @@ class CameraManager:
         self.rec.estimate_storage_per_hour_cam(camera=camera)
 
     def estimate_vid_storage_per_hour(self, estimation_duration_sec = 5):
-        for camera_idx in self.available_camera_indices:
+        for camera_idx in range(len(self.cameras)):
             self.estimate_vid_storage_per_hour_cam(camera_idx, estimation_duration_sec)
 
     def save_imgs_periodically(self) -> None:
@@ -0,0 +1,162 @@
+import logging
+import math
+import os
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from core.camera import Camera
+from utils.logger import setup_logger
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv"}
+
+class CameraManagerDisplay:
+    """
+    Tiles the latest frame of every camera into a single image, refreshed at a target rate.
+
+    All OpenCV HighGUI calls (imshow/waitKey) happen in the thread calling `run()`,
+    since HighGUI is not thread-safe. In headless mode no window is opened: the composite
+    is kept in memory (`last_composite`) and can be written to an image or a video file.
+
+    Attributes:
+        window_name (str): Title of the OpenCV display window.
+        refresh_fps (float): Target number of composites per second.
+        tile_size (tuple[int, int]): (width, height) of a single camera tile.
+        headless (bool): If True, never opens a window.
+        output_path (Optional[str]): If provided, each composite is written to this image (overwritten) or video file.
+        last_composite (Optional[np.ndarray]): The last composite that was rendered.
+    """
+
+    def __init__(self, window_name: str = "Camera Streams", refresh_fps: float = 30, tile_size: tuple[int, int] = (640, 480), headless: bool = False, output_path: Optional[str] = None):
+        self.logger: logging.Logger = setup_logger(self.__class__.__name__, log_file= "logs/camera_manager_display.log")
+        self.window_name = window_name
+        self.refresh_fps = refresh_fps
+        self.tile_size = tile_size
+        self.headless = headless
+        self.output_path = output_path
+        self.last_composite: Optional[np.ndarray] = None
+        self._canvas: Optional[np.ndarray] = None
+        self._tile_frame_ids: list[int] = []
+        self._writer: Optional[cv2.VideoWriter] = None
+
+    def _prep_canvas(self, nb_cameras: int) -> None:
+        """Allocates the composite once for a given number of cameras, in a near-square grid"""
+        cols = max(1, math.ceil(math.sqrt(nb_cameras)))
+        rows = max(1, math.ceil(nb_cameras / cols))
+        tile_w, tile_h = self.tile_size
+        self._canvas = np.zeros((rows * tile_h, cols * tile_w, 3), dtype=np.uint8)
+        self._tile_frame_ids = [0] * nb_cameras
+
+    def compose(self, cameras: list[Camera]) -> np.ndarray:
+        """Draws the latest frame of each camera into its tile of the composite.
+
+        Tiles whose camera has no new frame since the last call are left untouched.
+
+        Args:
+            cameras (list[Camera]): The cameras to tile, in order.
+
+        Returns:
+            np.ndarray: The composite image (reused between calls, copy it to keep it).
+        """
+        if self._canvas is None or len(self._tile_frame_ids) != len(cameras):
+            self._prep_canvas(len(cameras))
+
+        tile_w, tile_h = self.tile_size
+        cols = self._canvas.shape[1] // tile_w
+        for idx, camera in enumerate(cameras):
+            frame_id, frame = camera.get_latest_frame()
+            if frame is None or frame_id == self._tile_frame_ids[idx]:
+                continue
+            self._tile_frame_ids[idx] = frame_id
+
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            y = (idx // cols) * tile_h
+            x = (idx % cols) * tile_w
+            self._canvas[y:y + tile_h, x:x + tile_w] = cv2.resize(frame, (tile_w, tile_h), interpolation=cv2.INTER_AREA)
+            cv2.putText(self._canvas, camera.window_name, (x + 10, y + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        self.last_composite = self._canvas
+        return self._canvas
+
+    def _write_output(self, composite: np.ndarray) -> None:
+        if not self.output_path:
+            return
+        if os.path.splitext(self.output_path)[1].lower() not in VIDEO_EXTENSIONS:
+            cv2.imwrite(self.output_path, composite)
+            return
+        if self._writer is None:
+            height, width = composite.shape[:2]
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            self._writer = cv2.VideoWriter(self.output_path, fourcc, self.refresh_fps, (width, height))
+        self._writer.write(composite)
+
+    def run(self, cameras: list[Camera], duration_sec: Optional[float] = None, max_frames: Optional[int] = None) -> dict[str, float]:
+        """Renders composites at `refresh_fps` until 'q' is pressed, all cameras stopped, or a limit is reached.
+
+        Args:
+            cameras (list[Camera]): The cameras to tile. They must already be started.
+            duration_sec (Optional[float], optional): Stop after this many seconds. Defaults to None (no limit).
+            max_frames (Optional[int], optional): Stop after this many composites. Defaults to None (no limit).
+
+        Returns:
+            dict[str, float]: Stats of the run: number of composites, achieved fps and average compose time in ms.
+        """
+        if not self.headless:
+            print("Press 'q' to quit...")
+        period = 1 / self.refresh_fps
+        nb_frames = 0
+        compose_time = 0.0
+        start_time = time.perf_counter()
+        next_tick = start_time
+
+        try:
+            while any(camera.is_running for camera in cameras):
+                t0 = time.perf_counter()
+                composite = self.compose(cameras)
+                compose_time += time.perf_counter() - t0
+                nb_frames += 1
+
+                self._write_output(composite)
+                if not self.headless:
+                    cv2.imshow(self.window_name, composite)
+                    # allow for exit through q
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+
+                if max_frames is not None and nb_frames >= max_frames:
+                    break
+                if duration_sec is not None and time.perf_counter() - start_time >= duration_sec:
+                    break
+
+                # keep the target refresh rate without drifting
+                next_tick += period
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        finally:
+            self.close()
+
+        elapsed = time.perf_counter() - start_time
+        stats = {
+            "frames": nb_frames,
+            "fps": nb_frames / elapsed if elapsed > 0 else 0.0,
+            "avg_compose_ms": 1000 * compose_time / nb_frames if nb_frames else 0.0,
+        }
+        self.logger.info(f"Display stopped: {stats}")
+        return stats
+
+    def close(self) -> None:
+        """Releases the video writer and closes the window, if any"""
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        if not self.headless:
+            try:
+                cv2.destroyWindow(self.window_name)
+            except cv2.error as e:
+                self.logger.warning(f"Could not destroy window '{self.window_name}': {e}")
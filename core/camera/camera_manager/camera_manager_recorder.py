@@ -1,6 +1,7 @@
 import logging
 import math
 import os
+import re
 import time
 
 import cv2
@@ -19,7 +20,7 @@ class CameraManagerRecorder:
         self.vid_folder = vid_folder
         self.save_folder = save_folder
         self.save_interval = save_interval
-        if self.delete_prior_saves:
+        if self.delete_prior_saves and os.path.isdir(self.save_folder):
             clear_folder(self.save_folder)
 
     def prep_img_saving(self, available_camera_indices):
@@ -54,7 +55,7 @@ class CameraManagerRecorder:
         """
         frame = camera.capture_frame()
         if frame is None:
-            self.logger.warning(f"Camera {camera.camera_idx}: No frame captured. Skipping estimation.")
+            self.logger.warning(f"Camera {camera.source.label}: No frame captured. Skipping estimation.")
             return 
 
         # Save the image to disk
@@ -69,7 +70,7 @@ class CameraManagerRecorder:
         # estimate hourly storage spent
         mb_per_hour = file_size_mb * images_per_hour
 
-        print(f"Camera {camera.camera_idx}:")
+        print(f"Camera {camera.source.label}:")
         print(f"  -> Estimated image size: {file_size_mb:.2f} MB")
         print(f"  -> Images per hour (@ every {self.save_interval}s): {images_per_hour}")
         print(f"  -> Estimated storage per hour: {mb_per_hour:.2f} MB\n")
@@ -80,12 +81,14 @@ class CameraManagerRecorder:
     def estimate_vid_storage_per_hour_cam(self, camera: Camera, estimation_duration_sec = 5) -> None:
         frame = camera.capture_frame()
         if frame is None:
-            self.logger.warning(f"Camera {camera.camera_idx}: No frame captured. Skipping estimation.")
+            self.logger.warning(f"Camera {camera.source.label}: No frame captured. Skipping estimation.")
             return 
         
         height, width = frame.shape[:2]
         fourcc = cv2.VideoWriter_fourcc(*'XVID')  
-        test_filename = f"test_cam_{camera.camera_idx}.avi"
+        # the label of network/file sources is not a valid filename
+        safe_label = re.sub(r'[^\w.-]', '_', camera.source.label)
+        test_filename = f"test_cam_{safe_label}.avi"
         out = cv2.VideoWriter(test_filename, fourcc, self.save_fps, (width, height))
 
         start_time = time.time()
@@ -106,5 +109,5 @@ class CameraManagerRecorder:
         # Clean up test file
         os.remove(test_filename)
 
-        print(f"Camera {camera.camera_idx}:")
+        print(f"Camera {camera.source.label}:")
         print(f"  -> Estimated video size per hour: {estimated_hourly_mb:.2f} MB")
\ No newline at end of file
@@ -0,0 +1,197 @@
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Optional
+from urllib.parse import urlsplit
+
+import cv2
+
+NETWORK_SCHEMES = {"rtsp", "rtsps", "rtmp", "http", "https", "udp", "tcp"}
+
+# FFmpeg options applied to network captures: no internal buffering, low-delay decoding
+LOW_LATENCY_FFMPEG_OPTIONS = "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay"
+# OpenCV reads the FFmpeg capture options from this variable, shared by the whole process
+FFMPEG_OPTIONS_ENV = "OPENCV_FFMPEG_CAPTURE_OPTIONS"
+
+STATS_WINDOW = 120
+
+
+class CameraSource:
+    """
+    Describes where a Camera reads its frames from: a USB device, a network stream or a video file.
+
+    Attributes:
+        source (int | str): The USB index, the stream URL or the file path.
+        kind (str): One of "usb", "network" or "file".
+        label (str): A printable name of the source, with any credentials removed.
+        reconnect (bool): Whether to reopen the source when reading fails (network sources only by default).
+        reconnect_delay_sec (float): First delay before reconnecting. Doubled at each failed attempt.
+        max_reconnect_delay_sec (float): Upper bound of the reconnect delay.
+        open_timeout_ms (int): Timeout when opening a network stream.
+        read_timeout_ms (int): Timeout when reading a frame from a network stream.
+        loop (bool): Whether to restart a file from the beginning when it ends (file sources).
+        realtime (bool): Whether to read a file at its native fps instead of as fast as possible (file sources).
+        width (Optional[int]): Requested capture width (capture profile). None keeps the device default.
+        height (Optional[int]): Requested capture height (capture profile). None keeps the device default.
+        fps (Optional[float]): Requested capture fps (capture profile). None keeps the device default.
+    """
+
+    def __init__(self, source: int | str, reconnect: Optional[bool] = None, reconnect_delay_sec: float = 1.0, max_reconnect_delay_sec: float = 30.0,
+                 open_timeout_ms: int = 5000, read_timeout_ms: int = 5000, loop: bool = True, realtime: bool = True,
+                 width: Optional[int] = None, height: Optional[int] = None, fps: Optional[float] = None):
+        if isinstance(source, str) and source.strip().isdigit():
+            source = int(source)
+        self.source: int | str = source
+        self.kind: str = self._detect_kind(source)
+        self.label: str = self._make_label()
+        self.reconnect: bool = self.kind == "network" if reconnect is None else reconnect
+        self.reconnect_delay_sec = reconnect_delay_sec
+        self.max_reconnect_delay_sec = max_reconnect_delay_sec
+        self.open_timeout_ms = open_timeout_ms
+        self.read_timeout_ms = read_timeout_ms
+        self.loop = loop
+        self.realtime = realtime
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+    @staticmethod
+    def _detect_kind(source: int | str) -> str:
+        if isinstance(source, int):
+            return "usb"
+        scheme = urlsplit(source).scheme.lower()
+        if scheme in NETWORK_SCHEMES:
+            return "network"
+        return "file"
+
+    def _make_label(self) -> str:
+        if self.kind == "usb":
+            return f"usb {self.source}"
+        if self.kind == "file":
+            return os.path.basename(self.path)
+        parts = urlsplit(self.source)
+        host = parts.hostname or ""
+        if parts.port:
+            host = f"{host}:{parts.port}"
+        return f"{parts.scheme}://{host}{parts.path}"
+
+    @property
+    def path(self) -> str | int:
+        """The value to hand to cv2.VideoCapture"""
+        if self.kind == "file" and self.source.startswith("file://"):
+            return self.source[len("file://"):]
+        return self.source
+
+    def open(self) -> cv2.VideoCapture:
+        """Opens a capture on the source, applying the capture profile to USB devices
+
+        The FFmpeg options of network streams are global: see configure_network_capture().
+
+        Returns:
+            cv2.VideoCapture: The capture. Check isOpened() to know if it succeeded.
+        """
+        if self.kind == "file":
+            return cv2.VideoCapture(self.path)
+        if self.kind == "usb":
+            cap = cv2.VideoCapture(self.path)
+            if cap.isOpened():
+                self._apply_profile(cap)
+            return cap
+
+        params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, self.open_timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, self.read_timeout_ms]
+        cap = cv2.VideoCapture(self.path, cv2.CAP_FFMPEG, params)
+        if cap.isOpened():
+            # only the latest frame is kept anyway: don't let older ones pile up in the capture
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _apply_profile(self, cap: cv2.VideoCapture) -> None:
+        """Requests the resolution and fps of the capture profile. The device may pick the closest mode it supports"""
+        if self.width:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height:
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.kind}: {self.label})"
+
+
+def configure_network_capture(low_latency: bool = True) -> None:
+    """Sets the FFmpeg options of all the network captures opened afterwards
+
+    This is a global option: OpenCV reads it from an environment variable of the process,
+    so it cannot differ between sources. Call it once at startup, before opening any stream.
+
+    Args:
+        low_latency (bool, optional): Whether to disable FFmpeg's buffering and force RTSP over TCP. Defaults to True.
+            Options already set in OPENCV_FFMPEG_CAPTURE_OPTIONS by the user are kept either way.
+    """
+    if low_latency:
+        os.environ.setdefault(FFMPEG_OPTIONS_ENV, LOW_LATENCY_FFMPEG_OPTIONS)
+    elif os.environ.get(FFMPEG_OPTIONS_ENV) == LOW_LATENCY_FFMPEG_OPTIONS:
+        del os.environ[FFMPEG_OPTIONS_ENV]
+
+
+class SourceStats:
+    """
+    Rolling statistics of the frames read from a source.
+
+    Attributes:
+        frames (int): Number of frames read since start.
+        failures (int): Number of failed reads.
+        reconnects (int): Number of times the source was reopened.
+    """
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self._lock = threading.Lock()
+        self._intervals: deque[float] = deque(maxlen=window)
+        self._read_times: deque[float] = deque(maxlen=window)
+        self._last_frame_time: Optional[float] = None
+        self.frames: int = 0
+        self.failures: int = 0
+        self.reconnects: int = 0
+
+    def record_frame(self, read_start: float, read_end: float) -> None:
+        """Records a successful read, given the perf_counter() before and after it"""
+        with self._lock:
+            if self._last_frame_time is not None:
+                self._intervals.append(read_end - self._last_frame_time)
+            self._read_times.append(read_end - read_start)
+            self._last_frame_time = read_end
+            self.frames += 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def record_reconnect(self) -> None:
+        with self._lock:
+            self.reconnects += 1
+            # the gap caused by the reconnection is not jitter of the stream
+            self._last_frame_time = None
+
+    def snapshot(self) -> dict[str, float]:
+        """Returns the current statistics
+
+        Returns:
+            dict[str, float]: frames, failures and reconnects counters, the measured fps, the jitter
+                (std deviation of the time between frames), the average and max time spent blocked
+                reading a frame and the age of the latest frame. Times are in ms.
+        """
+        with self._lock:
+            intervals = list(self._intervals)
+            read_times = list(self._read_times)
+            last_frame_time = self._last_frame_time
+            stats = {"frames": self.frames, "failures": self.failures, "reconnects": self.reconnects}
+
+        mean_interval = statistics.fmean(intervals) if intervals else 0.0
+        stats["fps"] = 1 / mean_interval if mean_interval > 0 else 0.0
+        stats["jitter_ms"] = 1000 * statistics.pstdev(intervals) if len(intervals) > 1 else 0.0
+        stats["avg_read_ms"] = 1000 * statistics.fmean(read_times) if read_times else 0.0
+        stats["max_read_ms"] = 1000 * max(read_times) if read_times else 0.0
+        stats["frame_age_ms"] = 1000 * (time.perf_counter() - last_frame_time) if last_frame_time is not None else -1.0
+        return stats
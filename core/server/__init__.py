@@ -1,3 +1,4 @@
 from .server import Server
+from .server_budget import StreamBudget
 
-__all__ = ['Server']
\ No newline at end of file
+__all__ = ['Server', 'StreamBudget']
\ No newline at end of file
@@ -1,8 +1,10 @@
-from flask import Flask, Response, jsonify, render_template
+from flask import Flask, Response, jsonify, render_template, request
 from core.camera import CameraManager
 from .server_auth import ServerAuth
+from .server_budget import StreamBudget
+from .server_cache import ServerCache
 from utils.logger import setup_logger
-from dotenv import load_dotenv
+from typing import Optional
 import os
 
 class Server:
@@ -16,7 +18,7 @@ class Server:
         port (int): Port number for the server. Defaults to 5000.
     """
     
-    def __init__(self, camera_manager: CameraManager, host='0.0.0.0', port=5000):
+    def __init__(self, camera_manager: CameraManager, host='0.0.0.0', port=5000, username: Optional[str] = None, password: Optional[str] = None, budget: Optional[StreamBudget] = None):
         """
         Initializes the Server with a Camera instance and Flask app
 
@@ -24,15 +26,20 @@ class Server:
             camera_manager (CameraManager): The CameraManager instance to access available cams and stream videos from.
             host (str, optional): The host IP address. Defaults to '0.0.0.0'.
             port (int, optional): The port to run the Flask server on. Defaults to 5000.
+            username (Optional[str], optional): Username required to access the stream. Defaults to the STREAM_USERNAME environment variable.
+            password (Optional[str], optional): Password required to access the stream. Defaults to the STREAM_PASSWORD environment variable.
+            budget (Optional[StreamBudget], optional): Viewer and bandwidth limits of the video feeds. Defaults to None (unlimited).
         """
-        load_dotenv()
-        correct_username = os.getenv("STREAM_USERNAME")
-        correct_password = os.getenv("STREAM_PASSWORD")
+        correct_username = username if username is not None else os.getenv("STREAM_USERNAME")
+        correct_password = password if password is not None else os.getenv("STREAM_PASSWORD")
         self.auth = ServerAuth(correct_username=correct_username, correct_password=correct_password)
 
         self.logger = setup_logger(self.__class__.__name__, log_file= "logs/server.log")
 
-        self.app = Flask(__name__)
+        # static files are served from the cache (see setup_routes), not by Flask's default handler
+        self.app = Flask(__name__, static_folder=None)
+        self.cache = ServerCache(static_folder=os.path.join(self.app.root_path, "static"))
+        self.budget = budget if budget is not None else StreamBudget()
         self.camera_manager = camera_manager
         self.host = host
         self.port = port
@@ -46,13 +53,24 @@ class Server:
 
         Routes:
             /          : Simple HTML page showing the video stream.
+            /static    : Static assets (css, ...).
             /video_feed: Endpoint serving MJPEG video stream.
+            /stats     : Viewers, throughput and quality levels of the streams, and ingest stats of the cameras.
         """
         @self.app.route('/')
         @self.auth.requires_auth
         def index():
             cameras = list(range(len(self.camera_manager.cameras)))
-            return render_template('index.html', cameras=cameras)
+            # the page only depends on the camera set, so it is rendered again only when that changes
+            asset = self.cache.get_index(tuple(cameras), lambda: render_template('index.html', cameras=cameras))
+            return self.cache.make_response(asset, cache_control="private, no-cache")
+
+        @self.app.route('/static/<path:filename>', endpoint='static')
+        def static_file(filename):
+            asset = self.cache.get_static(filename)
+            if asset is None:
+                return jsonify({"error": "File not found"}), 404
+            return self.cache.make_response(asset, cache_control="public, max-age=300")
 
 
         @self.app.route('/video_feed/<int:camera_id>')
@@ -63,10 +81,30 @@ class Server:
             except IndexError:
                 return jsonify({"error": "Camera not found"}), 404
 
+            client = self.budget.admit(camera_id, remote_addr=request.remote_addr or "")
+            if client is None:
+                self.logger.warning(f"Refused viewer {request.remote_addr} of camera {camera_id}: stream budget exceeded")
+                response = jsonify({"error": "Stream budget exceeded, retry later"})
+                response.status_code = 503
+                response.headers["Retry-After"] = str(self.budget.retry_after_sec)
+                return response
+
+            def stream():
+                try:
+                    yield from camera.generate_frames(client)
+                finally:
+                    # runs when the viewer disconnects and the server closes the generator
+                    self.budget.release(client)
+
             return Response(
-                camera.generate_frames(),
+                stream(),
                 mimetype='multipart/x-mixed-replace; boundary=frame'
             )
+
+        @self.app.route('/stats')
+        @self.auth.requires_auth
+        def stats():
+            return jsonify({"streams": self.budget.get_stats(), "cameras": self.camera_manager.get_cameras_stats()})
         
         @self.app.errorhandler(500)
         def internal_error(error):
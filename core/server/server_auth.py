@@ -1,11 +1,17 @@
 from flask import Response, request
 from typing import Callable
+from collections import OrderedDict
 import functools
+import threading
 
 class ServerAuth:
-    def __init__(self, correct_username: str, correct_password: str):
+    def __init__(self, correct_username: str, correct_password: str, auth_cache_size: int = 32):
         self.correct_username = correct_username
         self.correct_password = correct_password
+        # LRU of raw Authorization headers that were already validated, so repeat requests skip the decode
+        self.auth_cache_size = auth_cache_size
+        self._auth_cache: OrderedDict[str, None] = OrderedDict()
+        self._auth_cache_lock = threading.Lock()
 
     def check_auth(self, username: str, password: str) -> bool:
         """Check if a username/password combination is valid."""
@@ -18,12 +24,39 @@ class ServerAuth:
             401,
             {'WWW-Authenticate': 'Basic realm="Login Required"'})
 
+    def _is_known_header(self, header: str) -> bool:
+        """Check if an Authorization header was already validated, and mark it as recently used."""
+        with self._auth_cache_lock:
+            if header in self._auth_cache:
+                self._auth_cache.move_to_end(header)
+                return True
+        return False
+
+    def _remember_header(self, header: str) -> None:
+        """Add a validated Authorization header to the LRU, evicting the least recently used one if full."""
+        if self.auth_cache_size <= 0:
+            return
+        with self._auth_cache_lock:
+            self._auth_cache[header] = None
+            self._auth_cache.move_to_end(header)
+            while len(self._auth_cache) > self.auth_cache_size:
+                self._auth_cache.popitem(last=False)
+
+    def clear_auth_cache(self) -> None:
+        """Forget every validated header (e.g. after the credentials changed)."""
+        with self._auth_cache_lock:
+            self._auth_cache.clear()
+
     def requires_auth(self, func: Callable) -> Callable:
         """Decorator to require HTTP Basic Auth on Flask routes."""
         @functools.wraps(func)
         def decorated(*args, **kwargs):
+            header = request.headers.get('Authorization')
+            if header and self._is_known_header(header):
+                return func(*args, **kwargs)
             auth = request.authorization
             if not auth or not self.check_auth(auth.username, auth.password):
                 return self.authenticate()
+            self._remember_header(header)
             return func(*args, **kwargs)
         return decorated
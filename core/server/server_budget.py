@@ -0,0 +1,262 @@
+from collections import deque
+from typing import Optional
+import itertools
+import threading
+import time
+
+# Quality levels streams are degraded through when over budget: (scale, jpeg quality, max fps).
+# None keeps the default of the camera (full resolution, OpenCV's default JPEG quality, every frame).
+QUALITY_LEVELS: list[tuple[float, Optional[int], Optional[float]]] = [
+    (1.0, None, None),
+    (1.0, 70, None),
+    (0.75, 60, 15),
+    (0.5, 50, 10),
+    (0.5, 40, 5),
+    (0.25, 30, 2),
+]
+# throughput is measured over this window
+RATE_WINDOW_SEC = 2.0
+# quality is raised again only when the throughput falls under this fraction of the budget
+RECOVER_RATIO = 0.6
+# upper bound of the wait before raising the quality of a camera that keeps going over budget
+MAX_RECOVER_HOLD_SEC = 60.0
+# how long the throughput measured at a quality level is trusted to predict whether that level fits the budget
+LEVEL_RATE_TTL_SEC = 600.0
+
+
+class StreamClient:
+    """
+    A viewer of a camera stream, with the throughput actually delivered to it.
+
+    The quality it should be streamed at (scale, jpeg_quality, max_fps) depends on the
+    degradation level the StreamBudget currently applies to its camera.
+
+    Attributes:
+        client_id (int): Unique id of the client.
+        camera_id (int): The camera being watched.
+        remote_addr (str): Address of the viewer.
+        bytes_sent (int): Total bytes delivered to the viewer.
+    """
+
+    def __init__(self, budget: "StreamBudget", client_id: int, camera_id: int, remote_addr: str = ""):
+        self._budget = budget
+        self.client_id = client_id
+        self.camera_id = camera_id
+        self.remote_addr = remote_addr
+        self.connected_at = time.monotonic()
+        self.bytes_sent = 0
+        self._samples: deque[tuple[float, int]] = deque()
+
+    @property
+    def level(self) -> int:
+        return self._budget.get_level(self.camera_id)
+
+    @property
+    def scale(self) -> float:
+        return QUALITY_LEVELS[self.level][0]
+
+    @property
+    def jpeg_quality(self) -> Optional[int]:
+        return QUALITY_LEVELS[self.level][1]
+
+    @property
+    def max_fps(self) -> Optional[float]:
+        return QUALITY_LEVELS[self.level][2]
+
+    def record_sent(self, nb_bytes: int) -> None:
+        """Accounts bytes once the server has handed them to the network"""
+        now = time.monotonic()
+        with self._budget._lock:
+            self.bytes_sent += nb_bytes
+            self._samples.append((now, nb_bytes))
+        self._budget._maybe_rebalance(now)
+
+    def _rate_bps(self, now: float) -> float:
+        """Bits per second delivered over the last RATE_WINDOW_SEC. Must be called with the budget lock held"""
+        while self._samples and now - self._samples[0][0] > RATE_WINDOW_SEC:
+            self._samples.popleft()
+        # a viewer that just connected has not had a full window yet: don't let its first frame look like a burst
+        window = max(0.5, min(RATE_WINDOW_SEC, now - self.connected_at))
+        return 8 * sum(nb_bytes for _, nb_bytes in self._samples) / window
+
+
+class StreamBudget:
+    """
+    Global and per-camera limits on the number of viewers and on the egress bandwidth.
+
+    While the measured throughput exceeds a bandwidth budget, the streams of the cameras involved
+    are degraded one QUALITY_LEVELS step at a time (lower JPEG quality, resolution, then fps),
+    and restored once the throughput is comfortably under the budget. New viewers are refused
+    when a viewer limit is reached or while a bandwidth budget is exceeded.
+    A limit of 0 means unlimited.
+
+    Attributes:
+        max_viewers (int): Maximum number of simultaneous viewers.
+        max_viewers_per_camera (int): Maximum number of simultaneous viewers of a single camera.
+        max_bps (float): Maximum total egress, in bits per second.
+        max_bps_per_camera (float): Maximum egress of a single camera, in bits per second.
+        retry_after_sec (int): Delay suggested to refused viewers.
+        rebalance_interval_sec (float): Minimum time between two evaluations of the budget.
+    """
+
+    def __init__(self, max_viewers: int = 0, max_viewers_per_camera: int = 0, max_bps: float = 0, max_bps_per_camera: float = 0,
+                 retry_after_sec: int = 10, rebalance_interval_sec: float = 1.0):
+        self.max_viewers = max_viewers
+        self.max_viewers_per_camera = max_viewers_per_camera
+        self.max_bps = max_bps
+        self.max_bps_per_camera = max_bps_per_camera
+        self.retry_after_sec = retry_after_sec
+        self.rebalance_interval_sec = rebalance_interval_sec
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._clients: dict[int, StreamClient] = {}
+        self._levels: dict[int, int] = {}
+        self._level_changed_at: dict[int, float] = {}
+        # per camera: how long to wait before raising the quality, when that wait last changed, and whether the last change raised it
+        self._recover_hold: dict[int, float] = {}
+        self._hold_changed_at: dict[int, float] = {}
+        self._last_change_recovered: dict[int, bool] = {}
+        # per camera and quality level: (throughput per viewer, when it was measured)
+        self._level_rates: dict[int, dict[int, tuple[float, float]]] = {}
+        self._camera_rates: dict[int, float] = {}
+        self._total_rate: float = 0.0
+        self._last_rebalance: float = 0.0
+        self.refused: int = 0
+
+    def get_level(self, camera_id: int) -> int:
+        return self._levels.get(camera_id, 0)
+
+    def admit(self, camera_id: int, remote_addr: str = "") -> Optional[StreamClient]:
+        """Registers a new viewer if the budget allows it
+
+        Args:
+            camera_id (int): The camera the viewer wants to watch.
+            remote_addr (str, optional): Address of the viewer, for the stats. Defaults to "".
+
+        Returns:
+            Optional[StreamClient]: The registered client, or None if it was refused
+        """
+        with self._lock:
+            self._measure(time.monotonic())
+            nb_camera_viewers = sum(1 for client in self._clients.values() if client.camera_id == camera_id)
+            refused = (
+                (self.max_viewers and len(self._clients) >= self.max_viewers)
+                or (self.max_viewers_per_camera and nb_camera_viewers >= self.max_viewers_per_camera)
+                # while over a bandwidth budget, existing viewers are being degraded: don't add to the load
+                or (self.max_bps and self._total_rate >= self.max_bps)
+                or (self.max_bps_per_camera and self._camera_rates.get(camera_id, 0.0) >= self.max_bps_per_camera)
+            )
+            if refused:
+                self.refused += 1
+                return None
+            client = StreamClient(self, next(self._ids), camera_id, remote_addr)
+            self._clients[client.client_id] = client
+            return client
+
+    def release(self, client: StreamClient) -> None:
+        """Unregisters a viewer that disconnected"""
+        with self._lock:
+            self._clients.pop(client.client_id, None)
+            if not any(other.camera_id == client.camera_id for other in self._clients.values()):
+                # the next viewer of this camera starts back at full quality
+                for camera_state in (self._levels, self._level_changed_at, self._recover_hold, self._hold_changed_at, self._last_change_recovered,
+                                     self._level_rates):
+                    camera_state.pop(client.camera_id, None)
+
+    def _measure(self, now: float) -> None:
+        """Updates the total and per-camera throughput. Must be called with the lock held"""
+        camera_rates: dict[int, float] = {}
+        for client in self._clients.values():
+            camera_rates[client.camera_id] = camera_rates.get(client.camera_id, 0.0) + client._rate_bps(now)
+        self._camera_rates = camera_rates
+        self._total_rate = sum(camera_rates.values())
+
+    def _projected_rate(self, camera_id: int, level: int, now: float) -> Optional[float]:
+        """Expected throughput of a camera at `level`, from the last time it was streamed at that level.
+        None if it was not measured recently. Must be called with the lock held"""
+        measured = self._level_rates.get(camera_id, {}).get(level)
+        if measured is None or now - measured[1] > LEVEL_RATE_TTL_SEC:
+            return None
+        nb_viewers = sum(1 for client in self._clients.values() if client.camera_id == camera_id)
+        return measured[0] * nb_viewers
+
+    def _maybe_rebalance(self, now: float) -> None:
+        """Measures the throughput and adapts the quality levels, at most once per rebalance_interval_sec"""
+        with self._lock:
+            if now - self._last_rebalance < self.rebalance_interval_sec:
+                return
+            self._last_rebalance = now
+            self._measure(now)
+
+            global_over = self.max_bps and self._total_rate > self.max_bps
+            global_under = not self.max_bps or self._total_rate < RECOVER_RATIO * self.max_bps
+            for camera_id, rate in self._camera_rates.items():
+                # a level change needs a full measurement window to show in the throughput
+                since_change = now - self._level_changed_at.get(camera_id, 0.0)
+                if since_change < RATE_WINDOW_SEC:
+                    continue
+                over = global_over or (self.max_bps_per_camera and rate > self.max_bps_per_camera)
+                under = global_under and (not self.max_bps_per_camera or rate < RECOVER_RATIO * self.max_bps_per_camera)
+                level = self.get_level(camera_id)
+                nb_viewers = sum(1 for client in self._clients.values() if client.camera_id == camera_id)
+                self._level_rates.setdefault(camera_id, {})[level] = (rate / nb_viewers, now)
+                hold = self._recover_hold.get(camera_id, RATE_WINDOW_SEC)
+                stable_since = max(self._level_changed_at.get(camera_id, 0.0), self._hold_changed_at.get(camera_id, 0.0))
+                if hold > RATE_WINDOW_SEC and self._last_change_recovered.get(camera_id) and not over and now - stable_since >= hold:
+                    # the last recovery stayed within budget for a full hold: the link is stable again, shorten the wait back
+                    hold = max(hold / 2, RATE_WINDOW_SEC)
+                    self._recover_hold[camera_id] = hold
+                    self._hold_changed_at[camera_id] = now
+                if over and level < len(QUALITY_LEVELS) - 1:
+                    if self._last_change_recovered.get(camera_id):
+                        # raising the quality put it over budget again: wait longer before the next try, to avoid flapping
+                        self._recover_hold[camera_id] = min(2 * hold, MAX_RECOVER_HOLD_SEC)
+                    self._levels[camera_id] = level + 1
+                    self._level_changed_at[camera_id] = now
+                    self._last_change_recovered[camera_id] = False
+                elif under and level > 0 and since_change >= hold and self._fits(camera_id, level - 1, rate, now):
+                    self._levels[camera_id] = level - 1
+                    self._level_changed_at[camera_id] = now
+                    self._last_change_recovered[camera_id] = True
+
+    def _fits(self, camera_id: int, level: int, rate: float, now: float) -> bool:
+        """Whether streaming a camera at `level` is expected to stay within the budgets. Must be called with the lock held
+
+        A level that did not fit recently is not tried again before LEVEL_RATE_TTL_SEC, instead of going over budget at every hold.
+        """
+        projected = self._projected_rate(camera_id, level, now)
+        if projected is None:
+            return True
+        if self.max_bps_per_camera and projected >= self.max_bps_per_camera:
+            return False
+        return not self.max_bps or self._total_rate - rate + projected < self.max_bps
+
+    def get_stats(self) -> dict:
+        """Returns the measured throughput, the quality level of each camera and the connected viewers
+
+        Returns:
+            dict: total and per-camera throughput (kbps), levels, refused viewers and the list of connected clients.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._measure(now)
+            clients = [
+                {
+                    "id": client.client_id,
+                    "camera": client.camera_id,
+                    "remote_addr": client.remote_addr,
+                    "connected_sec": round(now - client.connected_at, 1),
+                    "bytes_sent": client.bytes_sent,
+                    "kbps": round(client._rate_bps(now) / 1000, 1),
+                    "level": self.get_level(client.camera_id),
+                }
+                for client in self._clients.values()
+            ]
+            return {
+                "viewers": len(clients),
+                "refused": self.refused,
+                "total_kbps": round(self._total_rate / 1000, 1),
+                "camera_kbps": {camera_id: round(rate / 1000, 1) for camera_id, rate in self._camera_rates.items()},
+                "levels": dict(self._levels),
+                "clients": clients,
+            }
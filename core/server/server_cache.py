@@ -0,0 +1,149 @@
+from flask import Response, request
+from werkzeug.security import safe_join
+from datetime import datetime, timezone
+from typing import Callable, Hashable, Optional
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+# Bodies smaller than this are not worth the gzip header overhead
+GZIP_MIN_SIZE = 256
+
+
+class CachedAsset:
+    """
+    A pre-computed HTTP body, along with its gzip variant and validators.
+
+    Attributes:
+        body (bytes): The raw (identity-encoded) body.
+        gzip_body (Optional[bytes]): The gzip-compressed body, or None if compression is not worth it.
+        mimetype (str): The mimetype the body is served with.
+        etag (str): Strong validator derived from the content of the body.
+        last_modified (datetime): When the content was produced (UTC, second precision).
+        source_mtime (Optional[float]): mtime of the file the asset was read from, if any.
+    """
+
+    def __init__(self, body: bytes, mimetype: str, last_modified: datetime, source_mtime: Optional[float] = None):
+        self.body: bytes = body
+        self.gzip_body: Optional[bytes] = None
+        if len(body) >= GZIP_MIN_SIZE:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.gzip_body = compressed
+        self.mimetype: str = mimetype
+        self.etag: str = hashlib.sha1(body).hexdigest()
+        self.last_modified: datetime = last_modified.replace(microsecond=0)
+        self.source_mtime: Optional[float] = source_mtime
+
+
+class ServerCache:
+    """
+    Caches the rendered index page and the static assets of the server.
+
+    The index is re-rendered only when its cache key (the set of cameras) changes.
+    Static files are read once and re-read only when their mtime changes.
+    Every cached response carries an ETag and a Last-Modified header, so that
+    browsers and monitoring dashboards can revalidate with a cheap 304.
+
+    Attributes:
+        static_folder (str): The folder static assets are served from.
+    """
+
+    def __init__(self, static_folder: str):
+        """
+        Initializes an empty cache
+
+        Args:
+            static_folder (str): The folder static assets are served from.
+        """
+        self.static_folder: str = static_folder
+        self._lock = threading.Lock()
+        self._index_key: Optional[Hashable] = None
+        self._index_asset: Optional[CachedAsset] = None
+        self._static_assets: dict[str, CachedAsset] = {}
+
+    def get_index(self, key: Hashable, render: Callable[[], str]) -> CachedAsset:
+        """Returns the cached index page, rendering it again only if `key` changed.
+
+        Args:
+            key (Hashable): Everything the rendered page depends on (e.g. the camera ids).
+            render (Callable[[], str]): Renders the page. Only called on a cache miss.
+
+        Returns:
+            CachedAsset: The cached index page.
+        """
+        with self._lock:
+            if self._index_asset is not None and self._index_key == key:
+                return self._index_asset
+        asset = CachedAsset(render().encode("utf-8"), "text/html", datetime.now(timezone.utc))
+        with self._lock:
+            self._index_key = key
+            self._index_asset = asset
+        return asset
+
+    def get_static(self, filename: str) -> Optional[CachedAsset]:
+        """Returns the cached static asset, reloading it from disk if the file changed.
+
+        Args:
+            filename (str): Path of the asset, relative to the static folder.
+
+        Returns:
+            Optional[CachedAsset]: The cached asset, or None if no such file exists.
+        """
+        path = safe_join(self.static_folder, filename)
+        if path is None:
+            return None
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+
+        with self._lock:
+            asset = self._static_assets.get(path)
+        if asset is not None and asset.source_mtime == mtime:
+            return asset
+
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            body = f.read()
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        asset = CachedAsset(body, mimetype, datetime.fromtimestamp(mtime, timezone.utc), source_mtime=mtime)
+        with self._lock:
+            self._static_assets[path] = asset
+        return asset
+
+    def invalidate(self) -> None:
+        """Drops every cached entry"""
+        with self._lock:
+            self._index_key = None
+            self._index_asset = None
+            self._static_assets.clear()
+
+    @staticmethod
+    def make_response(asset: CachedAsset, cache_control: str = "no-cache") -> Response:
+        """Builds a conditional response for the current request out of a cached asset.
+
+        The gzip variant is served if the client accepts it. If the client already
+        holds a matching copy (If-None-Match / If-Modified-Since), a 304 is returned.
+
+        Args:
+            asset (CachedAsset): The asset to serve.
+            cache_control (str, optional): Value of the Cache-Control header. Defaults to "no-cache".
+
+        Returns:
+            Response: The response to send back.
+        """
+        use_gzip = asset.gzip_body is not None and request.accept_encodings["gzip"] > 0
+        response = Response(asset.gzip_body if use_gzip else asset.body, mimetype=asset.mimetype)
+        # each encoding is a different representation, so it needs its own validator
+        response.set_etag(f"{asset.etag}-gz" if use_gzip else asset.etag)
+        response.last_modified = asset.last_modified
+        response.headers["Cache-Control"] = cache_control
+        if asset.gzip_body is not None:
+            response.vary.add("Accept-Encoding")
+        if use_gzip:
+            response.content_encoding = "gzip"
+        return response.make_conditional(request)
@@ -1,36 +1,132 @@
-import os
+import time
+_import_start = time.perf_counter()
+
+import argparse
+import signal
+import sys
+import threading
 from core.camera import CameraManager
-from core.server import Server
+from core.server import Server, StreamBudget
+from utils.config import load_config
 from utils.input_handlers import input_yes_no, input_from_range_int
+from utils.logger import configure_logging, stop_logging
+from utils.timing import StageTimer
 
-if __name__ == "__main__":
-    log_folder = "logs"
-    save_folder = "saved_imgs"
-    if not os.path.exists(log_folder):
-        os.makedirs(log_folder)
-    if not os.path.exists(save_folder):
-        os.makedirs(save_folder)
-
-
-    ### Probing the user for wanted behavior
-    nb_wanted_cameras: int = input_from_range_int("please enter the number of USB cameras you want to use", {1,2,3,4,5,6,7,8,9,10})
-    save_flag: bool = input_yes_no("Would you like to save images periodically?", default=True)
-    save_interval: int = 0
-    save_overrite_flag: bool = False
-    if save_flag:
-        save_interval = input_from_range_int("Please choose the periodicity at which you would like to take the pictures", {1, 3, 5, 10, 20, 30})
-        save_overrite_flag = input_yes_no("Would you like to delete all previously saved images to save space?", default = True)
-
-    cam_manager = CameraManager(nb_wanted_cameras=nb_wanted_cameras, delete_prior_saves=save_overrite_flag, save_interval= save_interval)
-    server = Server(cam_manager)
+_import_time = time.perf_counter() - _import_start
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stream, display and record USB and network cameras.")
+    parser.add_argument("--config", help="path to a JSON config file (defaults to $STREAM_CONFIG, or config.json if it exists)")
+    parser.add_argument("--check", action="store_true", help="validate the configuration, print the startup time of each phase and exit without opening any camera")
+    parser.add_argument("--interactive", action="store_true", help="ask for the number of cameras and the saving behavior instead of reading them from the configuration")
+    return parser.parse_args(argv)
+
+
+def ask_user(config: dict) -> None:
+    """Probes the user for wanted behavior, overriding the corresponding config values"""
+    limits = config["limits"]
+    recording = config["recording"]
+    config["cameras"]["nb_usb"] = input_from_range_int("please enter the number of USB cameras you want to use", set(range(1, limits["max_usb_cameras"] + 1)))
+    recording["save_images"] = input_yes_no("Would you like to save images periodically?", default=True)
+    if recording["save_images"]:
+        intervals = {i for i in (1, 3, 5, 10, 20, 30) if i >= limits["min_save_interval"]}
+        recording["save_interval"] = input_from_range_int("Please choose the periodicity at which you would like to take the pictures", intervals)
+        recording["delete_prior_saves"] = input_yes_no("Would you like to delete all previously saved images to save space?", default = True)
+
+
+def print_startup_times(timer: StageTimer) -> None:
+    phases = timer.snapshot()
+    total_ms = sum(phase["avg_ms"] for phase in phases.values())
+    print("Startup time by phase:")
+    for name, phase in phases.items():
+        print(f"  {name:<20} {phase['avg_ms']:8.1f} ms")
+    print(f"  {'total':<20} {total_ms:8.1f} ms")
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    # stop on SIGTERM (systemd, docker stop) the same way as on Ctrl+C, so the cameras are released
+    raise KeyboardInterrupt
 
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    timer = StageTimer()
+    timer.record("import", _import_time)
+
+    try:
+        with timer.measure("load config"):
+            config = load_config(args.config)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    cameras, recording, server_config, analysis, limits = (config[s] for s in ("cameras", "recording", "server", "analysis", "limits"))
+    if args.check:
+        print(f"Configuration is valid ({config['_path'] or 'defaults and environment only'})")
+        print(f"  cameras: {cameras['nb_usb']} USB + {len(cameras['sources'])} other sources, profile '{cameras['profile']}'")
+        print(f"  mode: {server_config['mode']}, saving images: {recording['save_images']}, analysis: {analysis['enabled']}")
+        print_startup_times(timer)
+        return 0
+
+    if args.interactive:
+        ask_user(config)
+    configure_logging(**config["logging"])
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
+    cam_manager = None
     try:
-        if save_flag:
-            cam_manager.estimate_storage_per_hour()
-            cam_manager.estimate_vid_storage_per_hour()
+        with timer.measure("open cameras"):
+            cam_manager = CameraManager(
+                nb_wanted_cameras=cameras["nb_usb"],
+                max_tested_indices=cameras["max_tested_indices"],
+                sources=cameras["sources"],
+                capture_profile=config["profiles"][cameras["profile"]],
+                low_latency=cameras["low_latency"],
+                save_fps=recording["save_fps"],
+                vid_folder=recording["vid_folder"],
+                save_folder=recording["save_folder"],
+                delete_prior_saves=recording["delete_prior_saves"],
+                save_interval=recording["save_interval"],
+            )
+        if recording["save_images"]:
+            if recording["estimate_storage"]:
+                with timer.measure("estimate storage"):
+                    cam_manager.estimate_storage_per_hour()
+                    cam_manager.estimate_vid_storage_per_hour()
             cam_manager.save_imgs_periodically()
-        server.run(debug=False)
+        if analysis["enabled"]:
+            with timer.measure("start analysis"):
+                cam_manager.start_analysis(analysis_fps=analysis["fps"], crop_folder=analysis["crop_folder"])
+
+        if server_config["mode"] == "server":
+            with timer.measure("setup server"):
+                budget = StreamBudget(
+                    max_viewers=limits["max_viewers"],
+                    max_viewers_per_camera=limits["max_viewers_per_camera"],
+                    max_bps=limits["max_egress_kbps"] * 1000,
+                    max_bps_per_camera=limits["max_egress_per_camera_kbps"] * 1000,
+                    retry_after_sec=limits["retry_after_sec"],
+                )
+                server = Server(cam_manager, host=server_config["host"], port=server_config["port"],
+                                username=server_config["username"], password=server_config["password"], budget=budget)
+            print_startup_times(timer)
+            server.run(debug=server_config["debug"])
+        elif server_config["mode"] == "display":
+            print_startup_times(timer)
+            cam_manager.run_all_cameras(refresh_fps=server_config["display_fps"])
+        else:
+            print_startup_times(timer)
+            # only the background threads (recording, analysis) run: wait for Ctrl+C or SIGTERM
+            threading.Event().wait()
     except KeyboardInterrupt:
         pass
     finally:
-        cam_manager.stop_all_cameras()
\ No newline at end of file
+        if cam_manager is not None:
+            cam_manager.stop_all_cameras()
+        stop_logging()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
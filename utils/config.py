@@ -0,0 +1,260 @@
+import copy
+import json
+import os
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+from core.camera.camera_manager.camera_manager import MIN_TESTED_INDICES, MAX_TESTED_INDICES
+from utils.validators import validate_bt_zero, validate_between_inclusive
+
+DEFAULT_CONFIG_PATH = "config.json"
+ENV_PREFIX = "STREAM"
+# kept for the .env files written before the configuration file existed
+ENV_ALIASES = {
+    "STREAM_USERNAME": ("server", "username"),
+    "STREAM_PASSWORD": ("server", "password"),
+}
+SERVER_MODES = {"server", "display", "headless"}
+
+DEFAULT_CONFIG: dict[str, dict[str, Any]] = {
+    "cameras": {
+        "nb_usb": 1,
+        "max_tested_indices": 10,
+        "sources": [],
+        "profile": "default",
+        "low_latency": True,
+    },
+    "profiles": {
+        "default": {},
+        "low": {"width": 640, "height": 480, "fps": 15},
+        "hd": {"width": 1280, "height": 720, "fps": 30},
+    },
+    "recording": {
+        "save_images": True,
+        "save_interval": 5,
+        "delete_prior_saves": True,
+        "estimate_storage": True,
+        "save_folder": "saved_imgs",
+        "vid_folder": "saved_vids",
+        "save_fps": 10,
+    },
+    "server": {
+        "mode": "server",
+        "host": "0.0.0.0",
+        "port": 5000,
+        "debug": False,
+        "username": None,
+        "password": None,
+        "display_fps": 30.0,
+    },
+    "analysis": {
+        "enabled": False,
+        "fps": 2.0,
+        "crop_folder": "saved_crops",
+    },
+    "logging": {
+        "max_bytes": 10 * 1024 * 1024,
+        "backup_count": 3,
+        "rate_limit_sec": 10.0,
+    },
+    "limits": {
+        "max_usb_cameras": 10,
+        "max_sources": 64,
+        "min_save_interval": 1,
+        "max_analysis_fps": 30.0,
+        "max_viewers": 0,
+        "max_viewers_per_camera": 0,
+        "max_egress_kbps": 0.0,
+        "max_egress_per_camera_kbps": 0.0,
+        "retry_after_sec": 10,
+    },
+}
+
+
+def _merge(base: dict, override: dict) -> dict:
+    """Recursively merges `override` into a copy of `base`"""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _has_type_of(value: Any, default: Any) -> bool:
+    """Checks that a value has the type of the default value (ints are accepted where floats are expected)"""
+    if default is None or value is None:
+        return True
+    if isinstance(default, bool) or isinstance(value, bool):
+        return isinstance(value, bool) and isinstance(default, bool)
+    if isinstance(default, float):
+        return isinstance(value, (int, float))
+    return isinstance(value, type(default))
+
+
+def _parse_env_value(raw: str, default: Any) -> Any:
+    """Converts an environment variable to the type of the default value it overrides"""
+    if isinstance(default, bool):
+        return raw.strip().lower() in {"1", "true", "yes", "y", "on"}
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    if isinstance(default, list):
+        return [item.strip() for item in raw.split(",") if item.strip()]
+    return raw
+
+
+def _apply_env_overrides(config: dict) -> list[str]:
+    """Overrides config values with the STREAM_<SECTION>_<KEY> environment variables
+
+    Returns:
+        list[str]: errors for the environment variables that could not be parsed
+    """
+    errors: list[str] = []
+    for env_name, (section, key) in ENV_ALIASES.items():
+        if os.getenv(env_name) is not None:
+            config[section][key] = os.getenv(env_name)
+
+    for section, values in DEFAULT_CONFIG.items():
+        if section == "profiles":
+            continue
+        for key, default in values.items():
+            env_name = f"{ENV_PREFIX}_{section}_{key}".upper()
+            raw = os.getenv(env_name)
+            if raw is None:
+                continue
+            try:
+                config[section][key] = _parse_env_value(raw, default)
+            except ValueError:
+                errors.append(f"{env_name}: could not parse '{raw}' as {type(default).__name__}")
+    return errors
+
+
+def load_config(path: Optional[str] = None, env_file: Optional[str] = None) -> dict:
+    """Builds the configuration: defaults, then the config file, then the environment (and .env file)
+
+    Args:
+        path (Optional[str], optional): Path to a JSON config file. Defaults to $STREAM_CONFIG, or config.json if it exists.
+        env_file (Optional[str], optional): Path to the .env file. Defaults to None (searched for by python-dotenv).
+
+    Raises:
+        ValueError: if the config file or an environment variable cannot be parsed, or if the resulting config is invalid
+
+    Returns:
+        dict: The configuration, with the same sections as DEFAULT_CONFIG
+    """
+    load_dotenv(env_file)
+    path = path or os.getenv("STREAM_CONFIG")
+    if path is None and os.path.isfile(DEFAULT_CONFIG_PATH):
+        path = DEFAULT_CONFIG_PATH
+
+    file_config: dict = {}
+    if path is not None:
+        try:
+            with open(path) as f:
+                file_config = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Could not read config file {path}: {e}") from e
+        if not isinstance(file_config, dict):
+            raise ValueError(f"Config file {path} must contain a JSON object")
+
+    config = _merge(DEFAULT_CONFIG, file_config)
+    errors = _apply_env_overrides(config)
+    errors += validate_config(config)
+    if errors:
+        raise ValueError("Invalid configuration:\n  - " + "\n  - ".join(errors))
+    config["_path"] = path
+    return config
+
+
+def validate_config(config: dict) -> list[str]:
+    """Checks a configuration for unknown keys and out-of-range values
+
+    Args:
+        config (dict): The configuration to check
+
+    Returns:
+        list[str]: A description of each problem found (empty if the config is valid)
+    """
+    errors: list[str] = []
+    for section, values in config.items():
+        if section.startswith("_"):
+            continue
+        if section not in DEFAULT_CONFIG:
+            errors.append(f"unknown section '{section}'")
+            continue
+        if not isinstance(values, dict):
+            errors.append(f"section '{section}' must be an object")
+            continue
+        if section == "profiles":
+            errors += [f"profile '{name}' must be an object" for name, profile in values.items() if not isinstance(profile, dict)]
+            continue
+        for key, value in values.items():
+            if key not in DEFAULT_CONFIG[section]:
+                errors.append(f"unknown key '{section}.{key}'")
+            elif not _has_type_of(value, DEFAULT_CONFIG[section][key]):
+                errors.append(f"'{section}.{key}' must be of type {type(DEFAULT_CONFIG[section][key]).__name__}, got {value!r}")
+    if errors:
+        return errors
+
+    cameras, recording, server, analysis, limits = (config[s] for s in ("cameras", "recording", "server", "analysis", "limits"))
+
+    if not validate_between_inclusive(cameras["nb_usb"], 0, limits["max_usb_cameras"]):
+        errors.append(f"cameras.nb_usb must be within [0, {limits['max_usb_cameras']}], got {cameras['nb_usb']}")
+    if not validate_between_inclusive(cameras["max_tested_indices"], MIN_TESTED_INDICES, MAX_TESTED_INDICES):
+        errors.append(f"cameras.max_tested_indices must be within [{MIN_TESTED_INDICES}, {MAX_TESTED_INDICES}], got {cameras['max_tested_indices']}")
+    elif cameras["nb_usb"] > cameras["max_tested_indices"]:
+        errors.append(f"cameras.nb_usb ({cameras['nb_usb']}) cannot exceed cameras.max_tested_indices ({cameras['max_tested_indices']}): only that many device indices are probed")
+    for idx, source in enumerate(cameras["sources"]):
+        # a USB index, a stream URL or a file path
+        if isinstance(source, bool) or not isinstance(source, (int, str)) or (isinstance(source, str) and not source.strip()):
+            errors.append(f"cameras.sources[{idx}] must be a non-empty string or an integer, got {source!r}")
+    if len(cameras["sources"]) > limits["max_sources"]:
+        errors.append(f"cameras.sources has {len(cameras['sources'])} entries, more than limits.max_sources={limits['max_sources']}")
+    if not validate_bt_zero(cameras["nb_usb"] + len(cameras["sources"])):
+        errors.append("no camera configured: set cameras.nb_usb or cameras.sources")
+    if cameras["profile"] not in config["profiles"]:
+        errors.append(f"cameras.profile '{cameras['profile']}' is not one of {sorted(config['profiles'])}")
+    for name, profile in config["profiles"].items():
+        for key, value in profile.items():
+            if key not in {"width", "height", "fps"}:
+                errors.append(f"unknown key 'profiles.{name}.{key}'")
+            elif value is None:
+                continue
+            elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors.append(f"profiles.{name}.{key} must be a number, got {value!r}")
+            elif not validate_bt_zero(value):
+                errors.append(f"profiles.{name}.{key} must be positive, got {value}")
+
+    if recording["save_images"] and recording["save_interval"] < limits["min_save_interval"]:
+        errors.append(f"recording.save_interval must be at least {limits['min_save_interval']}, got {recording['save_interval']}")
+    if not validate_bt_zero(recording["save_fps"]):
+        errors.append(f"recording.save_fps must be positive, got {recording['save_fps']}")
+
+    if server["mode"] not in SERVER_MODES:
+        errors.append(f"server.mode must be one of {sorted(SERVER_MODES)}, got '{server['mode']}'")
+    if not validate_between_inclusive(server["port"], 1, 65535):
+        errors.append(f"server.port must be within [1, 65535], got {server['port']}")
+    if server["mode"] == "server" and not (server["username"] and server["password"]):
+        errors.append("server.username and server.password are required in server mode (or STREAM_USERNAME/STREAM_PASSWORD in .env)")
+    if not validate_bt_zero(server["display_fps"]):
+        errors.append(f"server.display_fps must be positive, got {server['display_fps']}")
+
+    log_config = config["logging"]
+    if not validate_bt_zero(log_config["max_bytes"]):
+        errors.append(f"logging.max_bytes must be positive, got {log_config['max_bytes']}")
+    if log_config["backup_count"] < 0 or log_config["rate_limit_sec"] < 0:
+        errors.append("logging.backup_count and logging.rate_limit_sec cannot be negative")
+
+    for key in ("max_viewers", "max_viewers_per_camera", "max_egress_kbps", "max_egress_per_camera_kbps"):
+        if limits[key] < 0:
+            errors.append(f"limits.{key} cannot be negative (0 means unlimited), got {limits[key]}")
+    if not validate_bt_zero(limits["retry_after_sec"]):
+        errors.append(f"limits.retry_after_sec must be positive, got {limits['retry_after_sec']}")
+
+    if analysis["enabled"] and not validate_between_inclusive(analysis["fps"], 0.01, limits["max_analysis_fps"]):
+        errors.append(f"analysis.fps must be within (0, {limits['max_analysis_fps']}], got {analysis['fps']}")
+    return errors
@@ -1,10 +1,208 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
 from typing import Optional
 
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+DEFAULT_RATE_LIMIT_SEC = 10.0
+MAX_TRACKED_MESSAGES = 1000
+# how often the writer thread reports the messages suppressed by the rate limit once their interval is over
+FLUSH_INTERVAL_SEC = 1.0
+
+# settings applied to the handlers created after configure_logging() is called
+_settings = {"max_bytes": DEFAULT_MAX_BYTES, "backup_count": DEFAULT_BACKUP_COUNT, "rate_limit_sec": DEFAULT_RATE_LIMIT_SEC}
+# all loggers push their records to this queue; a single background thread writes them
+_queue: queue.Queue = queue.Queue(-1)
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+_targets: dict[str, logging.Handler] = {}
+# rate limit filters, along with the handler their suppression reports are written to
+_rate_filters: list[tuple["RateLimitFilter", str]] = []
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets a given message through at most once per `interval_sec`, and counts the ones it drops.
+
+    Once the interval is over, the number of identical messages suppressed is reported, either by the
+    next copy of the message that gets through or by pop_reports(). Only applies to messages of
+    `min_level` and above: one-off informational messages are never merged.
+    Meant for hot loops (e.g. a camera failing on every frame), so that they cannot flood the disk.
+
+    Attributes:
+        interval_sec (float): Minimum time between two identical messages. 0 disables the limit.
+        min_level (int): Messages below this level are always let through.
+    """
+
+    def __init__(self, interval_sec: float = DEFAULT_RATE_LIMIT_SEC, min_level: int = logging.WARNING):
+        super().__init__()
+        self.interval_sec = interval_sec
+        self.min_level = min_level
+        self._lock = threading.Lock()
+        # (logger name, level, formatted message) -> [time it was last let through, number suppressed since]
+        self._seen: dict[tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.interval_sec <= 0 or record.levelno < self.min_level:
+            return True
+        try:
+            # the formatted message: the same template with different arguments is a different message
+            message = record.getMessage()
+        except Exception:
+            # malformed arguments: let the handler report the error as it normally would
+            return True
+        key = (record.name, record.levelno, message)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.interval_sec:
+                entry[1] += 1
+                return False
+            suppressed = entry[1] if entry is not None else 0
+            if entry is None and len(self._seen) >= MAX_TRACKED_MESSAGES:
+                self._forget_old(now)
+            self._seen[key] = [now, 0]
+
+        if suppressed:
+            record.msg = f"{message} (suppressed {suppressed} identical messages in the last {now - entry[0]:.1f}s)"
+            record.args = None
+        return True
+
+    def pop_reports(self, now: float, force: bool = False) -> list[logging.LogRecord]:
+        """Builds a record for each message whose interval is over and that had copies suppressed
+
+        Args:
+            now (float): The current time.monotonic().
+            force (bool, optional): Report all the suppressed messages, even those still in their interval. Defaults to False.
+
+        Returns:
+            list[logging.LogRecord]: One record per message, saying how many identical ones were suppressed.
+        """
+        reports: list[logging.LogRecord] = []
+        with self._lock:
+            for key, (last, suppressed) in list(self._seen.items()):
+                if suppressed and (force or now - last >= self.interval_sec):
+                    name, level, message = key
+                    reports.append(logging.LogRecord(name, level, "", 0, f"{message} (suppressed {suppressed} identical messages in the last {now - last:.1f}s)", None, None))
+                    del self._seen[key]
+        return reports
+
+    def _forget_old(self, now: float) -> None:
+        """Drops the messages that are out of their window, to keep memory bounded"""
+        for key in [key for key, (last, _) in self._seen.items() if now - last >= self.interval_sec]:
+            del self._seen[key]
+        if len(self._seen) >= MAX_TRACKED_MESSAGES:
+            self._seen.clear()
+
+
+class _TargetQueueHandler(logging.handlers.QueueHandler):
+    """Queues records along with the name of the handler that should write them"""
+
+    def __init__(self, log_queue: queue.Queue, target: str):
+        super().__init__(log_queue)
+        self.target = target
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = super().prepare(record)
+        record.log_target = self.target
+        return record
+
+
+class _WriterListener(logging.handlers.QueueListener):
+    """The background writer. Wakes up regularly to report the messages suppressed by the rate limit"""
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        while True:
+            try:
+                return self.queue.get(block, timeout=FLUSH_INTERVAL_SEC)
+            except queue.Empty:
+                if not block:
+                    raise
+                _write_rate_limit_reports()
+
+
+def _write_rate_limit_reports(force: bool = False) -> None:
+    """Writes the suppression reports of the rate limit filters. Called by the writer thread, or once it stopped"""
+    now = time.monotonic()
+    for rate_filter, target in list(_rate_filters):
+        for report in rate_filter.pop_reports(now, force):
+            _targets[target].handle(report)
+
+
+class _DispatchHandler(logging.Handler):
+    """Used by the writer thread to hand each record to the handler of its log file"""
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        handler = _targets.get(getattr(record, "log_target", ""))
+        if handler is not None:
+            handler.handle(record)
+        return True
+
+
+def configure_logging(max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT, rate_limit_sec: float = DEFAULT_RATE_LIMIT_SEC) -> None:
+    """Sets the rotation and rate limit of the loggers created afterwards
+
+    Args:
+        max_bytes (int, optional): Size at which a log file is rotated. Defaults to 10 MB.
+        backup_count (int, optional): Number of rotated files kept. Defaults to 3.
+        rate_limit_sec (float, optional): Minimum time between two identical messages. 0 disables it. Defaults to 10.
+    """
+    _settings.update(max_bytes=max_bytes, backup_count=backup_count, rate_limit_sec=rate_limit_sec)
+
+
+def _start_listener() -> None:
+    """Starts the background writer on first use, so that importing this module has no side effect"""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = _WriterListener(_queue, _DispatchHandler())
+            _listener.start()
+            atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Writes the pending records, reports the messages suppressed so far and stops the background writer"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+    _write_rate_limit_reports(force=True)
+    for handler in _targets.values():
+        handler.flush()
+
+
+def _get_target(log_file: Optional[str], formatter: logging.Formatter) -> str:
+    """Returns the name of the handler writing to `log_file` (or the console), creating it if needed"""
+    target = log_file or "<console>"
+    with _listener_lock:
+        if target not in _targets:
+            if log_file:
+                # the log folder is only created once a logger needs it, so importing the project has no side effect
+                log_folder = os.path.dirname(log_file)
+                if log_folder:
+                    os.makedirs(log_folder, exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=_settings["max_bytes"], backupCount=_settings["backup_count"])
+            else:
+                handler = logging.StreamHandler()
+            handler.setFormatter(formatter)
+            _targets[target] = handler
+    return target
+
+
 def setup_logger(name: str = None, level: int = logging.INFO, log_file: Optional[str] = None,) -> logging.Logger:
     """
     Sets up and returns a logger.
 
+    Records are only queued by the calling thread: a single background thread formats them
+    and writes them to size-rotated files. Identical warnings and errors are let through at most
+    once per rate limit interval (see configure_logging()), along with how many were suppressed.
+
     Args:
         name (Optional[str]): Name of the logger. If None, the root logger is used. Defaults to None.
         level (int, optional): The minimum log level for the logger (e.g., logging.INFO, logging.DEBUG). Defaults to logging.INFO.
@@ -18,15 +216,13 @@ def setup_logger(name: str = None, level: int = logging.INFO, log_file: Optional
     # check if the logger with that name has already been assigned handlers. Else create and add the handler + set the level
     if not logger.hasHandlers():
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        if log_file:
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-        else:
-            handler = logging.StreamHandler()
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-
+        target = _get_target(log_file, formatter)
+        queue_handler = _TargetQueueHandler(_queue, target)
+        rate_filter = RateLimitFilter(_settings["rate_limit_sec"])
+        queue_handler.addFilter(rate_filter)
+        _rate_filters.append((rate_filter, target))
+        logger.addHandler(queue_handler)
         logger.setLevel(level)
+        _start_listener()
     # return the configured logger
     return logger
@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Keeps the recent durations of named processing stages (e.g. "preprocess", "detect").
+
+    Attributes:
+        window (int): Number of recent durations kept per stage.
+    """
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations: dict[str, deque[float]] = {}
+
+    def record(self, stage: str, duration_sec: float) -> None:
+        """Records a duration (in seconds) for a stage"""
+        with self._lock:
+            if stage not in self._durations:
+                self._durations[stage] = deque(maxlen=self.window)
+            self._durations[stage].append(duration_sec)
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Context manager recording the time spent in its block for a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Returns the average and max duration of each stage, in ms
+
+        Returns:
+            dict[str, dict[str, float]]: {stage: {"avg_ms": ..., "max_ms": ..., "count": ...}}
+        """
+        with self._lock:
+            durations = {stage: list(values) for stage, values in self._durations.items()}
+        return {
+            stage: {
+                "avg_ms": 1000 * sum(values) / len(values),
+                "max_ms": 1000 * max(values),
+                "count": len(values),
+            }
+            for stage, values in durations.items() if values
+        }